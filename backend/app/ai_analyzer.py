@@ -1,10 +1,18 @@
-
 # This module handles AI analysis, dynamically using user-provided GROQ API keys
 
 import os
-import json
-from openai import OpenAI
+import time
+import logging
+import asyncio
+import hashlib
+import weakref
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
+from llm_cache import cached_completion, cached_completion_async
+from llm_json import parse_llm_json
+from prompt_budget import budget_text, budget_documents, token_budget, count_tokens, LLM_INPUT_MAX_CHARS
+from llm_scheduler import llm_scheduler
 
 # Optional: Try to load environment variables as fallback (but don't require them)
 env_paths = [
@@ -18,34 +26,105 @@ for env_path in env_paths:
         load_dotenv(env_path)
         break
 
-def analyze_resume_with_ai(resume_text, job_description=None, groq_api_key=None):
+logger = logging.getLogger(__name__)
+
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+AI_MODEL = "llama-3.1-8b-instant"  # Use Groq's model
+AI_SYSTEM_PROMPT = "You are a professional career coach with expertise in resume analysis. Always respond with valid JSON format only, no additional text."
+AI_TEMPERATURE = 0.3  # Lower temperature for more consistent JSON output
+AI_MAX_TOKENS = 1000
+
+# Connection pool settings for the shared async clients
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 10))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", 30))
+LLM_CLIENT_IDLE_SECONDS = float(os.getenv("LLM_CLIENT_IDLE_SECONDS", 300))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 60))
+
+
+class AsyncClientPool:
     """
-    Analyze resume text using an AI model to identify deficiencies and provide improvement suggestions.
-    
-    Args:
-        resume_text (str): Extracted resume text
-        job_description (str, optional): Job description text for context
-        groq_api_key (str): User-provided GROQ API key for dynamic authentication
-    
-    Returns:
-        dict: AI-generated insights or error message
+    Reusable AsyncOpenAI clients keyed by a hash of the API key, so repeated
+    requests with the same key share HTTP keep-alive connections instead of
+    paying a new TLS handshake. Clients idle for longer than idle_seconds are
+    closed and dropped. The raw API key is never stored.
+
+    An async client belongs to the event loop it was created on, so clients
+    (and the lock guarding them) are kept per loop; a loop only ever evicts
+    or closes its own clients. A loop's entries go away with the loop.
     """
-    # Validate API key
-    if not groq_api_key:
-        raise ValueError("GROQ API key is required. Please provide your API key.")
-    
-    # Initialize Groq client with user-provided API key
-    try:
-        client = OpenAI(
-            api_key=groq_api_key,
-            base_url="https://api.groq.com/openai/v1"
+
+    def __init__(self, base_url=GROQ_BASE_URL, idle_seconds=LLM_CLIENT_IDLE_SECONDS, transport=None):
+        self.base_url = base_url
+        self.idle_seconds = idle_seconds
+        self.transport = transport  # httpx transport override, for tests
+        self._loops = weakref.WeakKeyDictionary()  # event loop -> (lock, {key hash: (client, last used)})
+
+    @staticmethod
+    def _key_hash(api_key):
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+    def _new_client(self, api_key):
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=LLM_TIMEOUT_SECONDS,
+            transport=self.transport,
         )
-    except Exception as e:
-        raise ValueError(f"Failed to initialize GROQ client: {str(e)}")
-    
-    try:
-        # Define the base prompt
-        prompt = """
+        # Retries are owned by the LLM scheduler, which also knows about the key's rate limits
+        return AsyncOpenAI(api_key=api_key, base_url=self.base_url, http_client=http_client, max_retries=0)
+
+    def _loop_clients(self):
+        """(lock, clients) for the running loop, created on first use there"""
+        loop = asyncio.get_running_loop()
+        entry = self._loops.get(loop)
+        if entry is None:
+            entry = self._loops[loop] = (asyncio.Lock(), {})
+        return entry
+
+    async def get(self, api_key):
+        """Return the running loop's pooled client for an API key, creating it on first use"""
+        key = self._key_hash(api_key)
+        lock, clients = self._loop_clients()
+        async with lock:
+            await self._evict_idle(clients)
+            client = clients[key][0] if key in clients else self._new_client(api_key)
+            clients[key] = (client, time.monotonic())
+            return client
+
+    async def _evict_idle(self, clients):
+        now = time.monotonic()
+        for key, (client, last_used) in list(clients.items()):
+            if now - last_used > self.idle_seconds:
+                del clients[key]
+                await client.close()
+
+    async def close(self):
+        """Close the running loop's pooled clients"""
+        lock, clients = self._loop_clients()
+        async with lock:
+            closing = [client for client, _ in clients.values()]
+            clients.clear()
+        for client in closing:
+            await client.close()
+
+    def stats(self):
+        return {
+            "clients": sum(len(clients) for _, clients in list(self._loops.values())),
+            "max_connections": LLM_MAX_CONNECTIONS,
+        }
+
+
+client_pool = AsyncClientPool()
+
+
+def _build_messages(resume_text, job_description=None):
+    """Build the chat messages for a resume analysis request"""
+    # Define the base prompt
+    prompt = """
         You are an expert career coach analyzing a resume to identify areas for improvement. Your task is to:
         - Identify missing or weak sections (e.g., skills, extracurricular activities, certifications, work experience).
         - Suggest specific improvements to make the resume stronger for job applications.
@@ -66,108 +145,102 @@ def analyze_resume_with_ai(resume_text, job_description=None, groq_api_key=None)
 
         Do not include any text before or after the JSON object. Only return the JSON.
         """
-        
-        # Include job description if provided
-        job_description_section = ""
-        if job_description:
-            job_description_section = f"Job Description for Context:\n{job_description}\n\nPlease tailor your analysis to align with the job description where relevant."
-
-        # Format the prompt with dynamic inputs
-        formatted_prompt = prompt.format(
-            resume_text=resume_text,
-            job_description_section=job_description_section
+
+    # Keep the most informative sentences within the model's token budget. Budgeting
+    # is linear in the input, so capping it at LLM_INPUT_MAX_CHARS bounds it to a
+    # few ms; that is cheap enough to run inline on the event loop in the async path.
+    resume_text = resume_text[:LLM_INPUT_MAX_CHARS] if resume_text else resume_text
+    job_description = job_description[:LLM_INPUT_MAX_CHARS] if job_description else job_description
+    if job_description:
+        resume_text, job_description = budget_documents(
+            [(resume_text, None), (job_description, None)], token_budget(AI_MODEL)
         )
+    else:
+        resume_text = budget_text(resume_text, token_budget(AI_MODEL))
 
-        # Call the Groq API
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",  # Use Groq's model
-            messages=[
-                {"role": "system", "content": "You are a professional career coach with expertise in resume analysis. Always respond with valid JSON format only, no additional text."},
-                {"role": "user", "content": formatted_prompt}
-            ],
-            temperature=0.3,  # Lower temperature for more consistent JSON output
-            max_tokens=1000
+    # Include job description if provided
+    job_description_section = ""
+    if job_description:
+        job_description_section = f"Job Description for Context:\n{job_description}\n\nPlease tailor your analysis to align with the job description where relevant."
+
+    # Format the prompt with dynamic inputs
+    formatted_prompt = prompt.format(
+        resume_text=resume_text,
+        job_description_section=job_description_section
+    )
+
+    return [
+        {"role": "system", "content": AI_SYSTEM_PROMPT},
+        {"role": "user", "content": formatted_prompt}
+    ]
+
+
+def analyze_resume_with_ai(resume_text, job_description=None, groq_api_key=None):
+    """
+    Analyze resume text using an AI model to identify deficiencies and provide improvement suggestions.
+
+    Args:
+        resume_text (str): Extracted resume text
+        job_description (str, optional): Job description text for context
+        groq_api_key (str): User-provided GROQ API key for dynamic authentication
+
+    Returns:
+        dict: AI-generated insights or error message
+    """
+    # Validate API key
+    if not groq_api_key:
+        raise ValueError("GROQ API key is required. Please provide your API key.")
+
+    # Initialize Groq client with user-provided API key
+    try:
+        client = OpenAI(
+            api_key=groq_api_key,
+            base_url=GROQ_BASE_URL
+        )
+    except Exception as e:
+        raise ValueError(f"Failed to initialize GROQ client: {str(e)}")
+
+    try:
+        # Call the Groq API (identical prompts are answered from the response cache)
+        response_content = cached_completion(
+            client, AI_MODEL, _build_messages(resume_text, job_description), AI_TEMPERATURE, AI_MAX_TOKENS
         )
 
         # Parse and return the response as a dictionary
-        response_content = response.choices[0].message.content.strip()
-        
-        # Clean up the response content to extract JSON
-        if response_content.startswith('```json'):
-            response_content = response_content.replace('```json', '').replace('```', '').strip()
-        elif response_content.startswith('```'):
-            response_content = response_content.replace('```', '').strip()
-        
-        try:
-            # Try to parse as JSON first
-            ai_insights = json.loads(response_content)
-            
-            # Validate that required keys exist
-            if not isinstance(ai_insights, dict):
-                raise ValueError("Response is not a dictionary")
-            
-            # Ensure all required keys exist with default values
-            ai_insights.setdefault("deficiencies", ["No significant deficiencies identified"])
-            ai_insights.setdefault("suggestions", ["Continue developing existing skills"])
-            ai_insights.setdefault("critical_gaps", ["No critical gaps identified"])
-            
-            return ai_insights
-            
-        except (json.JSONDecodeError, ValueError) as e:
-            # If JSON parsing fails, try to extract useful information from the text
-            print(f"JSON parsing failed: {str(e)}")
-            print(f"Raw response: {response_content}")
-            
-            # Try to create a structured response from unstructured text
-            lines = response_content.split('\n')
-            deficiencies = []
-            suggestions = []
-            critical_gaps = []
-            
-            current_section = None
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Check for section headers
-                if any(keyword in line.lower() for keyword in ['deficienc', 'weakness', 'weak']):
-                    current_section = 'deficiencies'
-                    continue
-                elif any(keyword in line.lower() for keyword in ['suggestion', 'improve', 'recommend']):
-                    current_section = 'suggestions'
-                    continue
-                elif any(keyword in line.lower() for keyword in ['critical', 'gap', 'missing']):
-                    current_section = 'critical_gaps'
-                    continue
-                
-                # Extract bullet points or numbered items
-                if line.startswith(('-', '•', '*')) or line[0:2].strip().isdigit():
-                    cleaned_line = line.lstrip('-•*0123456789. ').strip()
-                    if cleaned_line:
-                        if current_section == 'deficiencies':
-                            deficiencies.append(cleaned_line)
-                        elif current_section == 'suggestions':
-                            suggestions.append(cleaned_line)
-                        elif current_section == 'critical_gaps':
-                            critical_gaps.append(cleaned_line)
-            
-            # If we couldn't extract structured data, provide the raw response
-            if not deficiencies and not suggestions and not critical_gaps:
-                return {
-                    "deficiencies": ["AI response could not be parsed properly"],
-                    "suggestions": ["Please try again or check your API key"],
-                    "critical_gaps": ["Response parsing failed"],
-                    "raw_response": response_content
-                }
-            
-            return {
-                "deficiencies": deficiencies if deficiencies else ["No specific deficiencies identified"],
-                "suggestions": suggestions if suggestions else ["Continue professional development"],
-                "critical_gaps": critical_gaps if critical_gaps else ["No critical gaps identified"],
-                "raw_response": response_content
-            }
+        return parse_llm_json(response_content, "resume_insights")
+
+    except Exception as e:
+        logger.error("AI analysis error: %s", e)
+        return {"error": f"AI analysis failed: {str(e)}"}
+
+
+async def analyze_resume_with_ai_async(resume_text, job_description=None, groq_api_key=None, timing=None):
+    """
+    Async variant of analyze_resume_with_ai for FastAPI endpoints.
+
+    Uses a pooled AsyncOpenAI client for the API key, so the request neither
+    blocks a worker thread nor opens a new connection per call. Requests go
+    through the LLM scheduler (concurrency cap, per-key rate limits, retries);
+    pass a dict as ``timing`` to receive its queueing and service times.
+    """
+    # Validate API key
+    if not groq_api_key:
+        raise ValueError("GROQ API key is required. Please provide your API key.")
+
+    try:
+        client = await client_pool.get(groq_api_key)
+    except Exception as e:
+        raise ValueError(f"Failed to initialize GROQ client: {str(e)}")
+
+    try:
+        messages = _build_messages(resume_text, job_description)
+        estimated_tokens = sum(count_tokens(message["content"]) for message in messages) + AI_MAX_TOKENS
+        response_content = await cached_completion_async(
+            client, AI_MODEL, messages, AI_TEMPERATURE, AI_MAX_TOKENS,
+            run=lambda request: llm_scheduler.run(groq_api_key, request, estimated_tokens, timing)
+        )
+        return parse_llm_json(response_content, "resume_insights")
 
     except Exception as e:
-        print(f"DEBUG - AI analysis error: {str(e)}")
-        return {"error": f"AI analysis failed: {str(e)}"}
\ No newline at end of file
+        logger.error("AI analysis error: %s", e)
+        return {"error": f"AI analysis failed: {str(e)}"}
@@ -0,0 +1,139 @@
+"""
+Bounded worker pools that keep blocking work off the asyncio event loop.
+
+CPU-bound stages (PDF extraction, OCR, spaCy) run on a process pool and
+blocking I/O (synchronous LLM calls) on a thread pool. Both pools are created
+on first use and sized from the environment:
+
+    CPU_WORKERS             process pool size (0 runs CPU work on the thread pool)
+    IO_WORKERS              thread pool size
+    MAX_QUEUE_DEPTH         jobs allowed in flight before new ones are rejected
+    CPU_POOL_START_METHOD   multiprocessing start method for the process pool
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from telemetry import configure_logging, current_trace, run_traced
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", min(2, os.cpu_count() or 1)))
+IO_WORKERS = int(os.getenv("IO_WORKERS", 8))
+MAX_QUEUE_DEPTH = int(os.getenv("MAX_QUEUE_DEPTH", 32))
+CPU_POOL_START_METHOD = os.getenv("CPU_POOL_START_METHOD", "spawn")
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_cpu_pool = None
+_io_pool = None
+_in_flight = 0
+
+
+class QueueFullError(Exception):
+    """Raised when MAX_QUEUE_DEPTH jobs are already waiting or running."""
+
+
+def _init_cpu_worker():
+    """Set up logging and load models in each new worker process before it accepts jobs"""
+    configure_logging()
+    try:
+        from warmup import warm_process
+        warm_process()
+    except Exception as e:
+        # A cold worker still serves requests; it loads models on first use instead
+        logger.warning("⚠️ CPU worker warmup failed: %s", e)
+
+
+def _get_cpu_pool():
+    global _cpu_pool
+    if CPU_WORKERS <= 0:
+        return _get_io_pool()
+    with _lock:
+        if _cpu_pool is None:
+            _cpu_pool = ProcessPoolExecutor(
+                max_workers=CPU_WORKERS,
+                mp_context=multiprocessing.get_context(CPU_POOL_START_METHOD),
+                initializer=_init_cpu_worker,
+            )
+        return _cpu_pool
+
+
+def _get_io_pool():
+    global _io_pool
+    with _lock:
+        if _io_pool is None:
+            _io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io-worker")
+        return _io_pool
+
+
+def _reset_cpu_pool():
+    """Drop a process pool whose worker died so the next job starts a fresh one"""
+    global _cpu_pool
+    with _lock:
+        if _cpu_pool is not None:
+            _cpu_pool.shutdown(wait=False, cancel_futures=True)
+            _cpu_pool = None
+
+
+async def _submit(pool_getter, fn, *args, **kwargs):
+    global _in_flight
+    if _in_flight >= MAX_QUEUE_DEPTH:
+        raise QueueFullError(f"Server busy: {_in_flight} jobs already queued, try again shortly")
+    _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        # Spans recorded in the worker come back with the result and join this request's trace
+        trace = current_trace()
+        request_id = trace.request_id if trace is not None else None
+        result, spans = await loop.run_in_executor(
+            pool_getter(), functools.partial(run_traced, request_id, fn, *args, **kwargs)
+        )
+        if trace is not None:
+            trace.merge(spans)
+        return result
+    finally:
+        _in_flight -= 1
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """
+    Run a CPU-bound function on the process pool.
+
+    ``fn`` and its arguments must be picklable (module-level functions and
+    plain data).
+    """
+    try:
+        return await _submit(_get_cpu_pool, fn, *args, **kwargs)
+    except BrokenProcessPool:
+        _reset_cpu_pool()
+        raise
+
+
+async def run_io(fn, *args, **kwargs):
+    """Run a blocking I/O-bound function on the thread pool."""
+    return await _submit(_get_io_pool, fn, *args, **kwargs)
+
+
+def pool_stats():
+    """Pool sizes and current queue depth, for /health"""
+    return {
+        "cpu_workers": CPU_WORKERS,
+        "io_workers": IO_WORKERS,
+        "max_queue_depth": MAX_QUEUE_DEPTH,
+        "in_flight": _in_flight,
+    }
+
+
+def shutdown_pools():
+    """Stop both pools; called when the application shuts down"""
+    global _cpu_pool, _io_pool
+    with _lock:
+        for pool in (_cpu_pool, _io_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
+        _io_pool = None
@@ -0,0 +1,197 @@
+"""
+Corpus-level IDF table: offline builder and memory-mapped reader.
+
+The table is a single little-endian binary file:
+
+    header   b"IDFT", version (uint32), term count n (uint32), document count (uint32)
+    offsets  uint64[n + 1]  byte offsets of each term inside the term blob
+    idf      float32[n]     IDF value of each term
+    blob     UTF-8 terms, sorted by their encoded bytes
+
+Workers memory-map the file and look terms up by binary search, so the
+vocabulary and IDF vector are never copied into the Python heap.
+
+Build a table from a directory of resumes/job descriptions (.pdf or .txt):
+
+    python backend/app/idf_table.py <corpus_dir> <output_path> [--min-df N]
+"""
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"IDFT"
+VERSION = 1
+_HEADER = struct.Struct("<4sIII")
+
+# Table loaded by SimpleTFIDF when IDF_TABLE_PATH is set
+IDF_TABLE_PATH = os.getenv("IDF_TABLE_PATH")
+
+_default_lock = threading.Lock()
+_default_table = None
+_default_loaded = False
+
+
+class IDFTable:
+    """Read-only, memory-mapped view of an IDF table file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, n_docs = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} IDF table")
+        self.n_terms = n
+        self.n_docs = n_docs
+        offsets_start = _HEADER.size
+        idf_start = offsets_start + 8 * (n + 1)
+        self._blob_start = idf_start + 4 * n
+        self._offsets = np.frombuffer(self._mm, dtype="<u8", count=n + 1, offset=offsets_start)
+        self._idf = np.frombuffer(self._mm, dtype="<f4", count=n, offset=idf_start)
+        self._min_idf = None
+
+    def __len__(self):
+        return self.n_terms
+
+    @property
+    def min_idf(self):
+        """Lowest IDF in the table (its most common term); 1.0, a term in every document, if empty"""
+        if self._min_idf is None:
+            self._min_idf = float(self._idf.min()) if self.n_terms else 1.0
+        return self._min_idf
+
+    def _term_at(self, i):
+        start = self._blob_start + int(self._offsets[i])
+        end = self._blob_start + int(self._offsets[i + 1])
+        return self._mm[start:end]
+
+    def get(self, term, default=None):
+        """Return the IDF of a term, or default if it is out of vocabulary"""
+        key = term.encode("utf-8")
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terms and self._term_at(lo) == key:
+            return float(self._idf[lo])
+        return default
+
+    def __contains__(self, term):
+        return self.get(term) is not None
+
+
+def write_idf_table(document_frequencies, n_docs, output_path):
+    """
+    Write an IDF table file from document frequencies.
+
+    IDF uses the smoothed form log((1 + N) / (1 + df)) + 1.
+
+    Args:
+        document_frequencies (dict): Term -> number of documents containing it
+        n_docs (int): Number of documents in the corpus
+        output_path (str): Where to write the table
+    """
+    terms = sorted(term.encode("utf-8") for term in document_frequencies)
+    offsets = np.zeros(len(terms) + 1, dtype="<u8")
+    np.cumsum([len(term) for term in terms], out=offsets[1:])
+    idf = np.array(
+        [math.log((1 + n_docs) / (1 + document_frequencies[term.decode("utf-8")])) + 1 for term in terms],
+        dtype="<f4"
+    )
+    with open(output_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(terms), n_docs))
+        f.write(offsets.tobytes())
+        f.write(idf.tobytes())
+        f.write(b"".join(terms))
+
+
+def _corpus_document_chunks(path):
+    """Text of a corpus document in chunks: cleaned pages of a .pdf, or a .txt file whole"""
+    if path.lower().endswith(".pdf"):
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+        from backend.utils.pdf_parser import iter_pdf_pages
+        return iter_pdf_pages(path)
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        return [f.read()]
+
+
+def build_idf_table(corpus_dir, output_path, min_df=1):
+    """
+    Compute document frequencies over a directory of resumes/JDs and save the table.
+
+    Terms are produced by SimpleTFIDF's own preprocessing, so the vocabulary
+    matches what the analyzer looks up at request time.
+
+    Args:
+        corpus_dir (str): Directory searched recursively for .pdf and .txt files
+        output_path (str): Where to write the table
+        min_df (int): Drop terms found in fewer documents than this
+
+    Returns:
+        int: Number of terms written
+    """
+    from simple_tfidf import SimpleTFIDF
+
+    paths = []
+    for root, _, names in os.walk(corpus_dir):
+        paths += [os.path.join(root, name) for name in sorted(names) if name.lower().endswith((".pdf", ".txt"))]
+
+    # PDFs are streamed page by page into the NLP stage (SimpleTFIDF.analyze_stream)
+    analyzer = SimpleTFIDF()
+    document_frequencies = {}
+    n_docs = 0
+    for path in paths:
+        try:
+            analysis = analyzer.analyze_stream(_corpus_document_chunks(path))
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {str(e)}")
+            continue
+        if not analysis.tokens:
+            print(f"⚠️ Skipping {path}: no text found")
+            continue
+        n_docs += 1
+        for term in set(analysis.tokens):
+            document_frequencies[term] = document_frequencies.get(term, 0) + 1
+    document_frequencies = {term: df for term, df in document_frequencies.items() if df >= min_df}
+
+    write_idf_table(document_frequencies, n_docs, output_path)
+    print(f"✅ IDF table with {len(document_frequencies)} terms from {n_docs} documents saved to {output_path}")
+    return len(document_frequencies)
+
+
+def get_default_idf_table():
+    """Memory-map the table at IDF_TABLE_PATH once per process (None if unset or unreadable)"""
+    global _default_table, _default_loaded
+    if _default_loaded:
+        return _default_table
+    with _default_lock:
+        if not _default_loaded:
+            if IDF_TABLE_PATH:
+                try:
+                    _default_table = IDFTable(IDF_TABLE_PATH)
+                    logger.info("✅ IDF table loaded from %s (%d terms)", IDF_TABLE_PATH, len(_default_table))
+                except Exception as e:
+                    logger.error("❌ Failed to load IDF table: %s", e)
+            _default_loaded = True
+    return _default_table
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a corpus-level IDF table for SimpleTFIDF")
+    parser.add_argument("corpus_dir", help="Directory of resume/job description .pdf or .txt files")
+    parser.add_argument("output_path", help="Output table file")
+    parser.add_argument("--min-df", type=int, default=1, help="Minimum document frequency to keep a term")
+    args = parser.parse_args()
+    build_idf_table(args.corpus_dir, args.output_path, min_df=args.min_df)
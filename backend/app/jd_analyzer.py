@@ -1,12 +1,12 @@
 # backend/jd_analyzer.py
+import logging
 from sklearn.feature_extraction.text import TfidfVectorizer
 from .tfidf_analyzer import preprocess_text  # Reuse preprocess_text from tfidf_analyzer
-import nltk
-from nltk.corpus import stopwords
+from .nlp_models import get_stopwords
 from nltk.tokenize import word_tokenize
 import string
 
-nltk.download('punkt')
+logger = logging.getLogger(__name__)
 
 def analyze_jd_with_tfidf(jd_text):
     """
@@ -22,13 +22,13 @@ def analyze_jd_with_tfidf(jd_text):
         # Preprocess the JD text (reuse preprocess_text from tfidf_analyzer)
         processed_text = preprocess_text(jd_text)
         if not processed_text:
-            print("Warning: Processed text is empty after preprocessing")
+            logger.warning("Processed text is empty after preprocessing")
             return {"top_keywords": []}
 
         # Initialize TF-IDF vectorizer
         vectorizer = TfidfVectorizer(
             max_features=10,  # Limit to top 10 keywords
-            stop_words=stopwords.words('english'),
+            stop_words=list(get_stopwords()),
             ngram_range=(1, 2)  # Include unigrams and bigrams
         )
 
@@ -46,5 +46,5 @@ def analyze_jd_with_tfidf(jd_text):
         return {"top_keywords": top_keywords}
     
     except Exception as e:
-        print(f"Error in JD TF-IDF analysis: {str(e)}")
+        logger.error("Error in JD TF-IDF analysis: %s", e)
         return {"top_keywords": [], "error": str(e)}
\ No newline at end of file
@@ -0,0 +1,273 @@
+"""
+Response cache for LLM completions.
+
+Entries are keyed by a fingerprint of everything that determines the model's
+answer - model name, temperature, max_tokens and the full chat messages (the
+formatted prompt plus the resume/job description text) - so re-running the
+same resume against the same job description skips the Groq round-trip. The
+API key is not part of the key and is never written to the cache. Only the
+completion text is stored; callers parse it exactly as a fresh response.
+
+    LLM_CACHE_BACKEND       memory (default), sqlite, or none
+    LLM_CACHE_TTL           seconds an entry stays valid (0 = no expiry)
+    LLM_CACHE_MAX_ENTRIES   entries kept before the least recently used is evicted
+    LLM_CACHE_PATH          SQLite database file for the sqlite backend
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from llm_json import LLM_JSON_MODE, request_json_completion, request_json_completion_async
+from telemetry import span
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 24 * 60 * 60))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1024))
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH", os.path.join(os.path.dirname(__file__), '..', 'utils', 'output', 'llm_cache.sqlite3')
+)
+
+
+def completion_key(model, messages, temperature, max_tokens):
+    """SHA-256 fingerprint of a chat completion request"""
+    payload = json.dumps(
+        {
+            "model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens,
+            "json_mode": LLM_JSON_MODE
+        },
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryResponseCache:
+    """In-process LRU cache of completion text with a TTL."""
+
+    blocking = False  # get/put never touch disk, so async callers call them inline
+
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored at, text)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return cached completion text, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, text):
+        """Store completion text, evicting the least recently used entry"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class SQLiteResponseCache:
+    """
+    On-disk cache of completion text in a SQLite database.
+
+    Survives restarts and is shared by every worker process on the host.
+    Recency is tracked in a last_used column for LRU eviction.
+    """
+
+    blocking = True  # get/put wait on disk and the database lock; async callers run them in a thread
+
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES, ttl=LLM_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # Connections must not cross a fork, so each process opens its own
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            conn.commit()
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        """Return cached completion text, or None on a miss or expired entry"""
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute("SELECT text, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                now = time.time()
+                if row is not None and self.ttl and now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.hits += 1
+                return row[0]
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Error reading LLM cache: %s", e)
+                self.misses += 1
+                return None
+
+    def put(self, key, text):
+        """Store completion text, evicting least recently used entries over max_entries"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            try:
+                conn = self._connection()
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, text, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, text, now, now)
+                )
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Error writing LLM cache: %s", e)
+
+    def stats(self):
+        with self._lock:
+            try:
+                entries = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            except sqlite3.Error:
+                entries = None
+            return {"backend": "sqlite", "hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+class NullResponseCache:
+    """Cache backend used when LLM_CACHE_BACKEND=none."""
+
+    blocking = False
+
+    def get(self, key):
+        return None
+
+    def put(self, key, text):
+        pass
+
+    def stats(self):
+        return {"backend": "none"}
+
+
+def create_response_cache(backend=LLM_CACHE_BACKEND):
+    """Build the cache backend selected by LLM_CACHE_BACKEND"""
+    if backend == "sqlite":
+        return SQLiteResponseCache()
+    if backend == "none":
+        return NullResponseCache()
+    if backend != "memory":
+        logger.warning("⚠️ Unknown LLM_CACHE_BACKEND '%s', using the in-memory cache", backend)
+    return MemoryResponseCache()
+
+
+llm_cache = create_response_cache()
+
+
+def cached_completion(client, model, messages, temperature, max_tokens):
+    """
+    Request a JSON completion through the response cache.
+
+    Args:
+        client (OpenAI): Client used on a cache miss
+        model (str): Model name
+        messages (list): Chat messages
+        temperature (float): Sampling temperature
+        max_tokens (int): Completion token limit
+
+    Returns:
+        str: Response text (the JSON object when one was found), from the cache or a fresh request
+    """
+    key = completion_key(model, messages, temperature, max_tokens)
+    content = llm_cache.get(key)
+    if content is not None:
+        logger.debug("LLM response cache hit")
+        return content
+
+    with span("llm"):
+        content = request_json_completion(client, model, messages, temperature, max_tokens)
+    if content:
+        llm_cache.put(key, content)
+    return content
+
+
+async def cached_completion_async(client, model, messages, temperature, max_tokens, run=None):
+    """
+    Async variant of cached_completion for AsyncOpenAI clients.
+
+    ``run``, when given, wraps the upstream request on a cache miss (it is
+    called with a zero-argument function returning the request awaitable),
+    e.g. to send it through the LLM scheduler. Cache hits bypass it. A
+    blocking (SQLite) cache is read and written on the I/O pool.
+    """
+    key = completion_key(model, messages, temperature, max_tokens)
+    content = await _cache_call(llm_cache.get, key)
+    if content is not None:
+        logger.debug("LLM response cache hit")
+        return content
+
+    def request():
+        return request_json_completion_async(client, model, messages, temperature, max_tokens)
+
+    with span("llm"):
+        content = await (run(request) if run else request())
+    if content:
+        await _cache_call(llm_cache.put, key, content)
+    return content
+
+
+async def _cache_call(method, *args):
+    """
+    Call a cache method, off the event loop when the backend blocks.
+
+    Uses asyncio.to_thread rather than executors.run_io: cache lookups are
+    short and must not count toward MAX_QUEUE_DEPTH, or a batch fan-out of
+    cached calls would be rejected as "Server busy".
+    """
+    if llm_cache.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
@@ -0,0 +1,305 @@
+"""
+Structured JSON output from the LLM: requesting it, extracting it and validating it.
+
+Every analysis asks the model for a single JSON object. Responses are read
+through JSONObjectExtractor, which scans the text once as it arrives (skipping
+markdown fences or preamble before the first "{") and reports completion as
+soon as the top-level object closes. With streaming, the rest of the
+generation is never read, so an over-long reply does not hold up the request.
+The parsed object is then checked against the schema of its analysis type,
+with defaults for missing fields.
+
+    LLM_JSON_MODE   request response_format={"type": "json_object"} (default true).
+                    The backend then guarantees a bare JSON object. Groq does not
+                    combine JSON mode with streaming, so with it disabled
+                    responses are streamed and cut off when the object closes.
+"""
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "true").lower() in ("1", "true", "yes")
+
+
+class JSONObjectExtractor:
+    """Incrementally finds the first complete top-level JSON object in a text stream."""
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.started = False
+        self.complete = False
+
+    def feed(self, chunk):
+        """
+        Consume the next piece of the response.
+
+        Args:
+            chunk (str): Text received from the model
+
+        Returns:
+            bool: True once the top-level object has closed
+        """
+        if self.complete or not chunk:
+            return self.complete
+        start = 0
+        if not self.started:
+            start = chunk.find("{")
+            if start == -1:
+                return False
+            self.started = True
+
+        for i in range(start, len(chunk)):
+            ch = chunk[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{" or ch == "[":
+                self._depth += 1
+            elif ch == "}" or ch == "]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._buffer.append(chunk[start:i + 1])
+                    self.complete = True
+                    return True
+        self._buffer.append(chunk[start:])
+        return False
+
+    def text(self):
+        """The JSON object text seen so far"""
+        return "".join(self._buffer)
+
+
+# Fields expected for each analysis type: name -> (type, default)
+SCHEMAS = {
+    "resume_insights": {
+        "fields": {
+            "deficiencies": (list, ["No significant deficiencies identified"]),
+            "suggestions": (list, ["Continue developing existing skills"]),
+            "critical_gaps": (list, ["No critical gaps identified"]),
+        },
+        # Headings recognised when the model answers in prose instead of JSON
+        "sections": {
+            "deficiencies": ["deficienc", "weakness", "weak"],
+            "suggestions": ["suggestion", "improve", "recommend"],
+            "critical_gaps": ["critical", "gap", "missing"],
+        },
+        "section_defaults": {
+            "deficiencies": ["No specific deficiencies identified"],
+            "suggestions": ["Continue professional development"],
+            "critical_gaps": ["No critical gaps identified"],
+        },
+        "fallback": {
+            "deficiencies": ["AI response could not be parsed properly"],
+            "suggestions": ["Please try again or check your API key"],
+            "critical_gaps": ["Response parsing failed"],
+        },
+    },
+    "strengths_weaknesses": {
+        "fields": {
+            "strengths": (list, []),
+            "weaknesses": (list, []),
+        },
+        "fallback": {
+            "strengths": ["Unable to parse structured response"],
+            "weaknesses": ["Please check the AI model response format"],
+        },
+    },
+    "job_fit": {
+        "fields": {
+            "fit_percentage": (int, 0),
+            "reasons": (list, []),
+            "suggestions": (list, []),
+        },
+        "fallback": {
+            "fit_percentage": 0,
+            "reasons": ["Unable to parse structured response"],
+            "suggestions": ["Please check the AI model response format"],
+        },
+    },
+}
+
+
+# Keys models use for the text of an object-shaped list item
+ITEM_TEXT_KEYS = ("text", "description", "suggestion", "reason", "detail", "content", "value", "name")
+
+
+def _list_item(item):
+    """
+    Text of one list entry: strings as is, the text field of an object when
+    it has one (or its only string value), anything else as JSON rather
+    than a Python repr. None entries are dropped.
+    """
+    if item is None or isinstance(item, str):
+        return item
+    if isinstance(item, dict):
+        for key in ITEM_TEXT_KEYS:
+            if isinstance(item.get(key), str):
+                return item[key]
+        strings = [value for value in item.values() if isinstance(value, str)]
+        if len(strings) == 1:
+            return strings[0]
+    return json.dumps(item, ensure_ascii=False)
+
+
+def _coerce(value, expected, default):
+    """Convert a field to the schema type, or return the default"""
+    if expected is list:
+        if isinstance(value, list):
+            return [text for text in map(_list_item, value) if text is not None]
+        if isinstance(value, str) and value.strip():
+            return [value.strip()]
+        return default
+    if expected is int:
+        if isinstance(value, bool):
+            return default
+        if isinstance(value, (int, float)):
+            return int(value)
+        try:
+            return int(float(str(value).strip().rstrip("%")))
+        except ValueError:
+            return default
+    return value
+
+
+def validate(data, schema_name):
+    """
+    Check a parsed object against an analysis schema.
+
+    Missing or mistyped fields get their defaults; unknown fields are kept.
+
+    Raises:
+        ValueError: If the response is not a JSON object
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a dictionary")
+    for field, (expected, default) in SCHEMAS[schema_name]["fields"].items():
+        data[field] = _coerce(data.get(field), expected, list(default) if expected is list else default)
+    return data
+
+
+def _parse_sections(response_content, schema):
+    """Recover list fields from a prose/bulleted answer using the schema's section headings"""
+    sections = schema.get("sections")
+    if not sections:
+        return None
+    found = {field: [] for field in sections}
+    current_section = None
+    for line in response_content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        # Check for section headers
+        heading = next(
+            (field for field, keywords in sections.items() if any(keyword in line.lower() for keyword in keywords)),
+            None
+        )
+        if heading:
+            current_section = heading
+            continue
+
+        # Extract bullet points or numbered items
+        if current_section and (line.startswith(('-', '•', '*')) or line[0:2].strip().isdigit()):
+            cleaned_line = line.lstrip('-•*0123456789. ').strip()
+            if cleaned_line:
+                found[current_section].append(cleaned_line)
+
+    if not any(found.values()):
+        return None
+    defaults = schema.get("section_defaults", {})
+    return {field: items or list(defaults.get(field, [])) for field, items in found.items()}
+
+
+def parse_llm_json(response_content, schema_name):
+    """
+    Extract, parse and validate the JSON object in an LLM response.
+
+    Args:
+        response_content (str): Full (or early-stopped) response text
+        schema_name (str): Key into SCHEMAS
+
+    Returns:
+        dict: Validated fields, or the schema's fallback with raw_response when parsing fails
+    """
+    response_content = (response_content or "").strip()
+    extractor = JSONObjectExtractor()
+    extractor.feed(response_content)
+    try:
+        return validate(json.loads(extractor.text()), schema_name)
+    except ValueError as e:  # json.JSONDecodeError is a ValueError
+        logger.warning("JSON parsing failed: %s", e)
+        logger.debug("Raw response: %s", response_content)
+
+    schema = SCHEMAS[schema_name]
+    result = _parse_sections(response_content, schema) or dict(schema["fallback"])
+    result["raw_response"] = response_content
+    return result
+
+
+def _request_options(model, messages, temperature, max_tokens):
+    options = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+    if LLM_JSON_MODE:
+        options["response_format"] = {"type": "json_object"}
+    else:
+        options["stream"] = True
+    return options
+
+
+def request_json_completion(client, model, messages, temperature, max_tokens):
+    """
+    Ask the model for a JSON object and return the response text.
+
+    In JSON mode a single response is requested; otherwise the response is
+    streamed and the stream is closed as soon as the top-level object ends.
+    """
+    options = _request_options(model, messages, temperature, max_tokens)
+    if not options.get("stream"):
+        response = client.chat.completions.create(**options)
+        return response.choices[0].message.content
+
+    extractor = JSONObjectExtractor()
+    received = []
+    stream = client.chat.completions.create(**options)
+    try:
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                received.append(delta)
+                if extractor.feed(delta):
+                    break
+    finally:
+        stream.close()
+    return extractor.text() if extractor.complete else "".join(received)
+
+
+async def request_json_completion_async(client, model, messages, temperature, max_tokens):
+    """Async variant of request_json_completion for AsyncOpenAI clients"""
+    options = _request_options(model, messages, temperature, max_tokens)
+    if not options.get("stream"):
+        response = await client.chat.completions.create(**options)
+        return response.choices[0].message.content
+
+    extractor = JSONObjectExtractor()
+    received = []
+    stream = await client.chat.completions.create(**options)
+    try:
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                received.append(delta)
+                if extractor.feed(delta):
+                    break
+    finally:
+        await stream.close()
+    return extractor.text() if extractor.complete else "".join(received)
@@ -0,0 +1,236 @@
+"""
+Concurrency- and rate-limit-aware scheduling of LLM requests.
+
+Every async LLM request goes through LLMScheduler.run, which
+
+  * caps the number of requests in flight (LLM_MAX_CONCURRENCY),
+  * spends from per-API-key token buckets for requests and prompt+completion
+    tokens per minute, so a batch fans out as fast as the key allows without
+    tripping Groq's limits,
+  * retries 429s, 5xx responses, timeouts and connection errors with full
+    jitter exponential backoff, honouring Retry-After and pausing the whole
+    key while it is rate limited,
+  * records per-request queueing and service time.
+
+    LLM_MAX_CONCURRENCY     requests in flight across all keys
+    LLM_REQUESTS_PER_MINUTE request budget per API key (0 = unlimited)
+    LLM_TOKENS_PER_MINUTE   prompt + completion token budget per API key (0 = unlimited)
+    LLM_MAX_RETRIES         retries after the first attempt
+    LLM_RETRY_BASE_DELAY    first backoff step in seconds (doubles per retry)
+    LLM_RETRY_MAX_DELAY     backoff cap in seconds
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import time
+import openai
+
+logger = logging.getLogger(__name__)
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 30))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 0))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 0.5))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", 20))
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at rate_per_minute, holding at most capacity."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, cost=1.0):
+        """Wait until cost tokens are available (and the bucket is not paused), then spend them"""
+        cost = min(cost, self.capacity)  # An oversized request waits for a full bucket rather than forever
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = max(self.blocked_until - now, (cost - self.tokens) / self.rate if self.tokens < cost else 0.0)
+                if wait <= 0:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for a while, e.g. after a 429"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def _is_retryable(error):
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error):
+    """Seconds from a Retry-After header, if the server sent one"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMScheduler:
+    """Runs LLM requests under a concurrency cap, per-key rate limits and retry policy."""
+
+    def __init__(
+        self,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+        max_retries=LLM_MAX_RETRIES,
+        base_delay=LLM_RETRY_BASE_DELAY,
+        max_delay=LLM_RETRY_MAX_DELAY,
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._loop = None
+        self._semaphore = None
+        self._buckets = {}  # key hash -> (request bucket, token bucket)
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.total_queue_seconds = 0.0
+        self.total_service_seconds = 0.0
+
+    def _bind_loop(self):
+        # asyncio primitives belong to one event loop; rebuild them if the loop changed
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._buckets = {}
+
+    def _key_buckets(self, api_key):
+        key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            buckets = self._buckets[key] = (
+                TokenBucket(self.requests_per_minute) if self.requests_per_minute > 0 else None,
+                TokenBucket(self.tokens_per_minute) if self.tokens_per_minute > 0 else None,
+            )
+        return buckets
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+        return delay
+
+    async def run(self, api_key, request, estimated_tokens=0, timing=None):
+        """
+        Run one LLM request under the scheduler.
+
+        Args:
+            api_key (str): Key the request is billed to (only its hash is kept)
+            request (callable): Zero-argument function returning a new awaitable per attempt
+            estimated_tokens (int): Prompt + completion tokens, spent from the token bucket
+            timing (dict, optional): Filled with queue_seconds, service_seconds and attempts
+
+        Returns:
+            The request's result
+
+        Raises:
+            The last error once retries are exhausted, or any non-retryable error
+        """
+        self._bind_loop()
+        request_bucket, token_bucket = self._key_buckets(api_key)
+        enqueued = time.perf_counter()
+        attempts = 0
+        self.waiting += 1
+        try:
+            while True:
+                # Rate-limit waits happen before taking a concurrency slot, so a key
+                # that is out of budget never holds slots other keys could use.
+                # The first wait counts as queueing, waits between retries as service time
+                if request_bucket:
+                    await request_bucket.acquire()
+                if token_bucket and estimated_tokens:
+                    await token_bucket.acquire(estimated_tokens)
+                async with self._semaphore:
+                    if attempts == 0:
+                        queue_seconds = time.perf_counter() - enqueued
+                        service_started = time.perf_counter()
+                        self.waiting -= 1
+                        self.in_flight += 1
+                    attempts += 1
+                    try:
+                        result = await request()
+                        break
+                    except Exception as e:
+                        if not _is_retryable(e) or attempts > self.max_retries:
+                            raise
+                        delay = self._backoff(attempts - 1, e)
+                        self.retries += 1
+                        if isinstance(e, openai.APIStatusError) and e.status_code == 429:
+                            self.rate_limited += 1
+                            # Hold every request on this key back, not just this one
+                            if request_bucket:
+                                request_bucket.pause(delay)
+                        logger.warning("LLM request failed (%s), retry %d/%d in %.2fs", e, attempts, self.max_retries, delay)
+                # Back off without holding a concurrency slot
+                await asyncio.sleep(delay)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            if attempts:
+                self.in_flight -= 1
+                service_seconds = time.perf_counter() - service_started
+                self.total_queue_seconds += queue_seconds
+                self.total_service_seconds += service_seconds
+            else:
+                self.waiting -= 1
+                queue_seconds = time.perf_counter() - enqueued
+                service_seconds = 0.0
+            if timing is not None:
+                timing.update({
+                    "queue_seconds": round(queue_seconds, 4),
+                    "service_seconds": round(service_seconds, 4),
+                    "attempts": attempts
+                })
+
+    def stats(self):
+        finished = self.completed + self.failed
+        return {
+            "max_concurrency": self.max_concurrency,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "avg_queue_seconds": round(self.total_queue_seconds / finished, 4) if finished else None,
+            "avg_service_seconds": round(self.total_service_seconds / finished, 4) if finished else None,
+        }
+
+
+llm_scheduler = LLMScheduler()
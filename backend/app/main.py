@@ -1,7 +1,11 @@
 import os
 import sys
+import asyncio
+import logging
+from typing import List
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -16,21 +20,214 @@ sys.path.append(os.path.abspath(UTILS_DIR))
 sys.path.append(os.path.abspath(APP_DIR))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))) 
 
-from backend.utils.pdf_parser import textextractionfunction
-from tfidf_analyzer import analyze_resume_with_tfidf, analyze_job_description_with_tfidf, calculate_resume_job_similarity, comprehensive_resume_job_analysis
-from ai_analyzer import analyze_resume_with_ai
+# Logging goes through a background queue; set up before the analyzers log at import
+from telemetry import configure_logging, current_trace, traced, RequestTraceMiddleware
+configure_logging()
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+from backend.utils.pdf_parser import textextractionfunction, extract_text_prefix, SAVE_EXTRACTED_TEXT
+from backend.utils.text_cache import text_cache, content_key
+from tfidf_analyzer import analyze_resume_with_tfidf, analyze_job_description_with_tfidf, calculate_resume_job_similarity, comprehensive_resume_job_analysis, rank_resumes_against_job
+from ai_analyzer import analyze_resume_with_ai_async, client_pool
+from llm_scheduler import llm_scheduler
+from llm_cache import llm_cache
+from pipeline import StageGraph, sse_event
+from prompt_budget import LLM_INPUT_MAX_CHARS
+from warmup import run_warmup, warmup_state, worker_model_stats
+from executors import run_cpu, run_io, pool_stats, shutdown_pools, QueueFullError, CPU_WORKERS
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm models in the background; /health reports ready once it finishes
+    warmup_task = asyncio.create_task(run_warmup())
+    yield
+    warmup_task.cancel()
+    await client_pool.close()
+    shutdown_pools()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],)
+app.add_middleware(RequestTraceMiddleware)
 
 OUTPUT_DIR = os.path.join(UTILS_DIR, 'output')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+async def extract_upload_text(content, filename):
+    """
+    Extract text from uploaded PDF bytes in memory, reusing cached text for identical uploads.
+
+    Args:
+        content (bytes): Uploaded file contents
+        filename (str): Upload name, used for the debug .txt copy
+
+    Returns:
+        str: Cleaned extracted text
+    """
+    key = content_key(content)
+    text = text_cache.get_memory(key)
+    if text is None:
+        # The disk tier reads files; keep it off the event loop
+        text = await run_io(text_cache.get, key) if text_cache.disk_dir else text_cache.get(key)
+    if text is not None:
+        return text
+
+    # The .txt copy is only written in debug mode (SAVE_EXTRACTED_TEXT)
+    output_path = os.path.join(OUTPUT_DIR, f"{filename}.txt") if SAVE_EXTRACTED_TEXT else None
+    text = await run_cpu(traced("extract", textextractionfunction), content, output_path)
+    if text_cache.disk_dir:
+        await run_io(text_cache.put, key, text)
+    else:
+        text_cache.put(key, text)
+    return text
+
+async def extract_prompt_text(content):
+    """
+    Text of an uploaded PDF for LLM prompts: its first LLM_INPUT_MAX_CHARS characters.
+
+    Taken from the text cache when the full text is already there; otherwise
+    pages are streamed (pdf_parser.iter_pdf_pages) and extraction stops at the
+    cap, so the LLM call can start before the whole document (and its OCR) is done.
+    """
+    text = text_cache.get_memory(content_key(content))
+    if text is not None:
+        return text[:LLM_INPUT_MAX_CHARS]
+    return await run_cpu(traced("extract", extract_text_prefix), content, LLM_INPUT_MAX_CHARS)
+
+async def run_llm_assessment(resume_text, job_description, groq_api_key, label="AI analysis", timing=None):
+    """Run the LLM assessment if an API key was given, folding failures into an error dict"""
+    if not groq_api_key:
+        return None
+    try:
+        return await analyze_resume_with_ai_async(resume_text, job_description, groq_api_key=groq_api_key, timing=timing)
+    except Exception as ai_error:
+        logger.warning("%s failed: %s", label, ai_error)
+        return {"error": f"{label} failed: {str(ai_error)}"}
+
+def resume_analysis_graph(content, filename, groq_api_key):
+    """
+    Stages for /analyze-resume/: TF-IDF runs on the extracted text while the AI
+    analysis starts from the prompt's share of the document (prompt_text).
+    """
+    graph = StageGraph()
+    if groq_api_key:
+        # Registered first so its pages are extracted ahead of the whole document
+        graph.add("prompt_text", lambda: extract_prompt_text(content))
+    graph.add("extract", lambda: extract_upload_text(content, filename))
+    graph.add("tfidf", lambda resume_text: run_cpu(analyze_resume_with_tfidf, resume_text), "extract")
+    graph.add(
+        "llm",
+        lambda resume_text: run_llm_assessment(resume_text, None, groq_api_key),
+        "prompt_text" if groq_api_key else "extract"
+    )
+    return graph
+
+def resume_job_match_graph(content, filename, job_description, groq_api_key):
+    """Stages for /match-resume-job/: comprehensive analysis and the AI fit assessment overlap"""
+    graph = StageGraph()
+    if groq_api_key:
+        graph.add("prompt_resume", lambda: extract_prompt_text(content))
+    graph.add("extract_resume", lambda: extract_upload_text(content, filename))
+    graph.add(
+        "tfidf",
+        lambda resume_text: run_cpu(comprehensive_resume_job_analysis, resume_text, job_description),
+        "extract_resume"
+    )
+    graph.add(
+        "llm",
+        lambda resume_text: run_llm_assessment(resume_text, job_description, groq_api_key, "AI fit assessment"),
+        "prompt_resume" if groq_api_key else "extract_resume"
+    )
+    return graph
+
+def resume_job_pdf_match_graph(resume_content, resume_filename, jd_content, jd_filename, groq_api_key):
+    """Stages for /match-resume-job-pdf/: both PDFs are extracted in parallel, then analysis and AI overlap"""
+    graph = StageGraph()
+    if groq_api_key:
+        graph.add("prompt_resume", lambda: extract_prompt_text(resume_content))
+        graph.add("prompt_job", lambda: extract_prompt_text(jd_content))
+    graph.add("extract_resume", lambda: extract_upload_text(resume_content, resume_filename))
+    graph.add("extract_job", lambda: extract_upload_text(jd_content, jd_filename))
+    graph.add(
+        "tfidf",
+        lambda resume_text, job_description_text: run_cpu(
+            comprehensive_resume_job_analysis, resume_text, job_description_text
+        ),
+        "extract_resume", "extract_job"
+    )
+    graph.add(
+        "llm",
+        lambda resume_text, job_description_text: run_llm_assessment(
+            resume_text, job_description_text, groq_api_key, "AI fit assessment"
+        ),
+        *(("prompt_resume", "prompt_job") if groq_api_key else ("extract_resume", "extract_job"))
+    )
+    return graph
+
+def resume_analysis_events(stage, result):
+    """Server-sent events for a finished /analyze-resume/ stage"""
+    if stage == "extract":
+        return [("extracted_text", {"extracted_text": result})]
+    if stage == "tfidf":
+        return [("keywords", {"tfidf_analysis": result["top_keywords"]})]
+    if stage == "llm":
+        return [("llm", {"llm_strengths_weaknesses": result})]
+    return []
+
+def resume_job_match_events(stage, result):
+    """Server-sent events for a finished match stage; TF-IDF results are split into keywords and similarity"""
+    if stage == "extract_resume":
+        return [("extracted_text", {"resume_text": result})]
+    if stage == "extract_job":
+        return [("extracted_text", {"job_description_text": result})]
+    if stage == "tfidf":
+        return [
+            ("keywords", {
+                "resume_analysis": result["resume_analysis"],
+                "job_description_analysis": result["job_description_analysis"]
+            }),
+            ("similarity", {"similarity_analysis": result["similarity_analysis"]})
+        ]
+    if stage == "llm":
+        return [("llm", {"llm_fit_assessment": result})]
+    return []
+
+def stream_graph(graph, events):
+    """
+    Stream a stage graph as server-sent events, one section per finished stage.
+
+    Args:
+        graph (StageGraph): Stages to run
+        events (callable): Maps (stage name, result) to a list of (event, payload) pairs
+
+    Returns:
+        StreamingResponse: text/event-stream ending with a "done" (or "error") event
+    """
+    async def event_stream():
+        try:
+            async for stage, result in graph.as_completed():
+                for event, payload in events(stage, result):
+                    yield sse_event(event, payload)
+            trace = current_trace()
+            yield sse_event("done", {
+                "timings_ms": graph.timings_ms(),
+                "spans_ms": trace.spans_ms() if trace is not None else {}
+            })
+        except QueueFullError as e:
+            yield sse_event("error", {"status": 503, "error": str(e)})
+        except Exception as e:
+            yield sse_event("error", {"status": 500, "error": f"Processing failed: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/")
 def home():
     return {"message": "AI-Powered Job Assistant API is running!", "status": "healthy"}
@@ -38,44 +235,29 @@ def home():
 @app.post("/analyze-resume/")
 async def analyze_resume(file: UploadFile = File(...), groq_api_key: str = Form(None)):
     try:
-        file_path = os.path.join(OUTPUT_DIR, file.filename)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        output_path = os.path.join(OUTPUT_DIR, f"{file.filename}.txt")
-        resume_text = textextractionfunction(file_path, output_path)
-        tfidf_result = analyze_resume_with_tfidf(resume_text)
-        
-        # Add AI analysis if API key is provided
-        llm_analysis = None
-        if groq_api_key:
-            try:
-                llm_analysis = analyze_resume_with_ai(resume_text, groq_api_key=groq_api_key)
-            except Exception as ai_error:
-                print(f"AI analysis failed: {str(ai_error)}")
-                llm_analysis = {"error": f"AI analysis failed: {str(ai_error)}"}
+        graph = resume_analysis_graph(await file.read(), file.filename, groq_api_key)
+        results = await graph.run()
         
-        try:
-            os.remove(file_path)
-            os.remove(output_path)
-        except Exception:
-            pass
         return JSONResponse(content={
-            "extracted_text": resume_text,
-            "tfidf_analysis": tfidf_result["top_keywords"],
-            "llm_strengths_weaknesses": llm_analysis
-        })
+            "extracted_text": results["extract"],
+            "tfidf_analysis": results["tfidf"]["top_keywords"],
+            "llm_strengths_weaknesses": results["llm"]
+        }, headers={"Server-Timing": graph.server_timing()})
+    except QueueFullError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": f"Processing failed: {str(e)}"})
 
 @app.post("/analyze-job-description/")
 async def analyze_job_description(job_description: str = Form(...)):
     try:
-        tfidf_result = analyze_job_description_with_tfidf(job_description)
+        tfidf_result = await run_cpu(analyze_job_description_with_tfidf, job_description)
         return JSONResponse(content={
             "job_description_text": job_description,
             "tfidf_analysis": tfidf_result
         })
+    except QueueFullError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": f"Processing failed: {str(e)}"})
 
@@ -86,69 +268,35 @@ async def match_resume_job(
     groq_api_key: str = Form(None)
 ):
     try:
-        # Extract resume text
-        file_path = os.path.join(OUTPUT_DIR, file.filename)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        output_path = os.path.join(OUTPUT_DIR, f"{file.filename}.txt")
-        resume_text = textextractionfunction(file_path, output_path)
-        
-        # Perform comprehensive analysis
-        analysis_result = comprehensive_resume_job_analysis(resume_text, job_description)
-        
-        # Add AI fit assessment if API key is provided
-        llm_fit_assessment = None
-        if groq_api_key:
-            try:
-                llm_fit_assessment = analyze_resume_with_ai(resume_text, job_description, groq_api_key=groq_api_key)
-            except Exception as ai_error:
-                print(f"AI fit assessment failed: {str(ai_error)}")
-                llm_fit_assessment = {"error": f"AI fit assessment failed: {str(ai_error)}"}
+        graph = resume_job_match_graph(await file.read(), file.filename, job_description, groq_api_key)
+        results = await graph.run()
         
-        # Cleanup
-        try:
-            os.remove(file_path)
-            os.remove(output_path)
-        except Exception:
-            pass
-            
         return JSONResponse(content={
-            "resume_text": resume_text,
+            "resume_text": results["extract_resume"],
             "job_description_text": job_description,
-            "analysis": analysis_result,
-            "llm_fit_assessment": llm_fit_assessment
-        })
+            "analysis": results["tfidf"],
+            "llm_fit_assessment": results["llm"]
+        }, headers={"Server-Timing": graph.server_timing()})
+    except QueueFullError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": f"Processing failed: {str(e)}"})
 
 @app.post("/analyze-job-description-pdf/")
 async def analyze_job_description_pdf(file: UploadFile = File(...)):
     try:
-        # Save uploaded file
-        file_path = os.path.join(OUTPUT_DIR, file.filename)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
         # Extract text from PDF
-        output_path = os.path.join(OUTPUT_DIR, f"{file.filename}.txt")
-        job_description_text = textextractionfunction(file_path, output_path)
+        job_description_text = await extract_upload_text(await file.read(), file.filename)
         
         # Analyze with TF-IDF
-        tfidf_result = analyze_job_description_with_tfidf(job_description_text)
-        
-        # Cleanup files
-        try:
-            os.remove(file_path)
-            os.remove(output_path)
-        except Exception:
-            pass
+        tfidf_result = await run_cpu(analyze_job_description_with_tfidf, job_description_text)
         
         return JSONResponse(content={
             "extracted_text": job_description_text,
             "tfidf_analysis": tfidf_result
         })
+    except QueueFullError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": f"Processing failed: {str(e)}"})
 
@@ -159,77 +307,175 @@ async def match_resume_job_pdf(
     groq_api_key: str = Form(None)
 ):
     try:
-        # Extract resume text
-        resume_file_path = os.path.join(OUTPUT_DIR, file.filename)
-        with open(resume_file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        resume_output_path = os.path.join(OUTPUT_DIR, f"{file.filename}.txt")
-        resume_text = textextractionfunction(resume_file_path, resume_output_path)
-        
-        # Extract job description text
-        jd_file_path = os.path.join(OUTPUT_DIR, jd_file.filename)
-        with open(jd_file_path, "wb") as f:
-            content = await jd_file.read()
-            f.write(content)
-        jd_output_path = os.path.join(OUTPUT_DIR, f"{jd_file.filename}.txt")
-        job_description_text = textextractionfunction(jd_file_path, jd_output_path)
+        graph = resume_job_pdf_match_graph(
+            await file.read(), file.filename, await jd_file.read(), jd_file.filename, groq_api_key
+        )
+        results = await graph.run()
         
-        # Perform comprehensive analysis
-        analysis_result = comprehensive_resume_job_analysis(resume_text, job_description_text)
-        
-        # Add AI fit assessment if API key is provided
-        llm_fit_assessment = None
+        return JSONResponse(content={
+            "resume_text": results["extract_resume"],
+            "job_description_text": results["extract_job"],
+            "analysis": results["tfidf"],
+            "llm_fit_assessment": results["llm"]
+        }, headers={"Server-Timing": graph.server_timing()})
+    except QueueFullError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": f"Processing failed: {str(e)}"})
+
+@app.post("/match-resumes-batch/")
+async def match_resumes_batch(
+    files: List[UploadFile] = File(...),
+    job_description: str = Form(...),
+    groq_api_key: str = Form(None),
+    llm_top_k: int = Form(None)
+):
+    try:
+        # Name debug copies uniquely so resumes sharing a filename don't collide
+        uploads = [(file.filename, f"batch_{i}_{file.filename}", await file.read()) for i, file in enumerate(files)]
+
+        # Extract resumes a pool's width at a time so the batch doesn't fill the queue
+        extracted = []
+        window = max(1, CPU_WORKERS)
+        for start in range(0, len(uploads), window):
+            chunk = uploads[start:start + window]
+            extracted += await asyncio.gather(
+                *(extract_upload_text(content, name) for _, name, content in chunk),
+                return_exceptions=True
+            )
+
+        resumes = []
+        failed = []
+        for (filename, _, _), result in zip(uploads, extracted):
+            if isinstance(result, Exception):
+                failed.append({"filename": filename, "error": f"Text extraction failed: {str(result)}"})
+            else:
+                resumes.append((filename, result))
+
+        # Score the job description once and every resume against it
+        ranking = await run_cpu(rank_resumes_against_job, [text for _, text in resumes], job_description)
+
+        ranked_resumes = []
+        for rank, entry in enumerate(ranking["ranked_resumes"], start=1):
+            ranked_resumes.append({
+                "rank": rank,
+                "filename": resumes[entry["index"]][0],
+                "similarity_analysis": entry["similarity_analysis"],
+                "top_keywords": entry["top_keywords"]
+            })
+
+        # AI fit assessments for the best llm_top_k matches (all by default) fan out through the LLM scheduler
         if groq_api_key:
-            try:
-                llm_fit_assessment = analyze_resume_with_ai(resume_text, job_description_text, groq_api_key=groq_api_key)
-            except Exception as ai_error:
-                print(f"AI fit assessment failed: {str(ai_error)}")
-                llm_fit_assessment = {"error": f"AI fit assessment failed: {str(ai_error)}"}
-        
-        # Cleanup files
-        try:
-            os.remove(resume_file_path)
-            os.remove(resume_output_path)
-            os.remove(jd_file_path)
-            os.remove(jd_output_path)
-        except Exception:
-            pass
-            
+            top_k = len(ranked_resumes) if llm_top_k is None else max(0, llm_top_k)
+            assessed = list(zip(ranked_resumes[:top_k], ranking["ranked_resumes"][:top_k]))
+            timings = [{} for _ in assessed]
+            assessments = await asyncio.gather(*(
+                run_llm_assessment(
+                    resumes[entry["index"]][1], job_description, groq_api_key, "AI fit assessment", timing=timing
+                )
+                for (_, entry), timing in zip(assessed, timings)
+            ))
+            for (ranked, _), assessment, timing in zip(assessed, assessments, timings):
+                ranked["llm_fit_assessment"] = assessment
+                ranked["llm_timing"] = timing
+
         return JSONResponse(content={
-            "resume_text": resume_text,
-            "job_description_text": job_description_text,
-            "analysis": analysis_result,
-            "llm_fit_assessment": llm_fit_assessment
+            "job_description_text": job_description,
+            "job_description_analysis": ranking["job_description_analysis"],
+            "total_resumes": len(files),
+            "ranked_resumes": ranked_resumes,
+            "failed_resumes": failed
         })
+    except QueueFullError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": f"Processing failed: {str(e)}"})
 
+@app.post("/analyze-resume-stream/")
+async def analyze_resume_stream(file: UploadFile = File(...), groq_api_key: str = Form(None)):
+    """/analyze-resume/ as server-sent events: extracted_text, keywords, llm, done"""
+    graph = resume_analysis_graph(await file.read(), file.filename, groq_api_key)
+    return stream_graph(graph, resume_analysis_events)
+
+@app.post("/match-resume-job-stream/")
+async def match_resume_job_stream(
+    file: UploadFile = File(...),
+    job_description: str = Form(...),
+    groq_api_key: str = Form(None)
+):
+    """/match-resume-job/ as server-sent events: extracted_text, keywords, similarity, llm, done"""
+    graph = resume_job_match_graph(await file.read(), file.filename, job_description, groq_api_key)
+    return stream_graph(graph, resume_job_match_events)
+
+@app.post("/match-resume-job-pdf-stream/")
+async def match_resume_job_pdf_stream(
+    file: UploadFile = File(...),
+    jd_file: UploadFile = File(...),
+    groq_api_key: str = Form(None)
+):
+    """/match-resume-job-pdf/ as server-sent events: extracted_text, keywords, similarity, llm, done"""
+    graph = resume_job_pdf_match_graph(
+        await file.read(), file.filename, await jd_file.read(), jd_file.filename, groq_api_key
+    )
+    return stream_graph(graph, resume_job_match_events)
+
 @app.get("/health")
 def health_check():
     """Health check endpoint with system status"""
     import os
+    model_info = {}
     try:
         # Test if we can import the analyzer
-        from tfidf_analyzer import client, nlp
+        from tfidf_analyzer import client
+        from nlp_models import model_stats
         groq_status = "configured" if client else "not configured"
-        spacy_status = "loaded" if nlp else "not loaded"
+        model_info = model_stats()
+        # With CPU_WORKERS > 0 the model lives in the pool workers, not in this process
+        workers = worker_model_stats()
+        if workers and model_info["status"] == "not loaded":
+            model_info = workers[0]
+        spacy_status = model_info["status"]
     except Exception as e:
         groq_status = f"error: {str(e)}"
         spacy_status = f"error: {str(e)}"
     
-    return {
-        "status": "healthy",
+    # Not ready (503) until the startup warmup has loaded the models
+    warmup = warmup_state()
+    ready = warmup["status"] == "ready"
+    if ready:
+        status = "healthy"
+    elif warmup["status"] == "failed":
+        status = "unhealthy"
+    else:
+        status = "warming up"
+
+    content = {
+        "status": status,
+        "ready": ready,
+        "warmup": warmup,
         "message": "AI-Powered Job Assistant API is running",
         "version": "1.0.0",
         "groq_api_key": bool(os.getenv("GROQ_API_KEY")),
         "groq_client": groq_status,
         "spacy_model": spacy_status,
+        "spacy_model_load_time_seconds": model_info.get("load_time_seconds"),
+        "spacy_model_memory_bytes": model_info.get("memory_bytes"),
+        "spacy_model_workers": worker_model_stats(),
+        "worker_pools": pool_stats(),
+        "pdf_text_cache": text_cache.stats(),
+        "llm_client_pool": client_pool.stats(),
+        "llm_response_cache": llm_cache.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
         "endpoints": [
             "/analyze-resume/",
             "/analyze-job-description/",
             "/analyze-job-description-pdf/",
             "/match-resume-job/",
-            "/match-resume-job-pdf/"
+            "/match-resume-job-pdf/",
+            "/match-resumes-batch/",
+            "/analyze-resume-stream/",
+            "/match-resume-job-stream/",
+            "/match-resume-job-pdf-stream/"
         ]
-    }
\ No newline at end of file
+    }
+    return content if ready else JSONResponse(status_code=503, content=content)
\ No newline at end of file
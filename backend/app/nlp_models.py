@@ -0,0 +1,133 @@
+"""
+Shared spaCy model registry.
+
+The model is loaded lazily, once per process, and shared by every analyzer.
+Callers ask for a pipeline profile that disables the components their use case
+does not need instead of loading their own trimmed copy of the model.
+
+Stopword lists are loaded the same way and shared as frozensets. Neither the
+model nor NLTK data is downloaded at runtime; both are installed at build time
+(build.sh, Dockerfile).
+"""
+import logging
+import os
+import threading
+import time
+import spacy
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = os.getenv("SPACY_MODEL", "en_core_web_sm")
+
+# Components skipped per use case
+PROFILES = {
+    "default": ["parser"],                                       # tagger + NER for TF-IDF preprocessing
+    "tagger": ["parser", "ner", "lemmatizer"],                   # POS tags only
+    "ner": ["tagger", "parser", "attribute_ruler", "lemmatizer"],  # entities only
+    "full": [],
+}
+
+_lock = threading.Lock()
+_model = None
+_views = {}
+_stopwords = {}
+_stats = {"status": "not loaded", "load_time_seconds": None, "memory_bytes": None}
+
+
+class ModelView:
+    """A profile of the shared model: runs it with some components disabled."""
+
+    def __init__(self, model, disable):
+        self.model = model
+        self.disable = [name for name in disable if name in model.pipe_names]
+
+    def __call__(self, text):
+        return self.model(text, disable=self.disable)
+
+    def pipe(self, texts, **kwargs):
+        return self.model.pipe(texts, disable=self.disable, **kwargs)
+
+
+def _rss_bytes():
+    """Resident set size of this process in bytes (0 if unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return 0
+
+
+def _load_model():
+    global _model
+    with _lock:
+        if _model is not None or _stats["status"] != "not loaded":
+            return _model
+        start_rss = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            _model = spacy.load(MODEL_NAME)
+            _stats["status"] = "loaded"
+            logger.info("✅ spaCy model '%s' loaded successfully", MODEL_NAME)
+        except OSError as e:
+            _stats["status"] = f"error: {str(e)}"
+            logger.error("❌ spaCy model '%s' not found; install it with `python -m spacy download %s`", MODEL_NAME, MODEL_NAME)
+        except Exception as e:
+            _stats["status"] = f"error: {str(e)}"
+            logger.error("❌ Failed to load spaCy model: %s", e)
+        _stats["load_time_seconds"] = round(time.perf_counter() - start, 3)
+        _stats["memory_bytes"] = max(_rss_bytes() - start_rss, 0)
+        return _model
+
+
+def get_nlp(profile="default"):
+    """
+    Get the shared spaCy model for a use case, loading it on first use.
+
+    Args:
+        profile (str): One of PROFILES; selects which components are disabled
+
+    Returns:
+        ModelView: Callable wrapper around the shared model, or None if it failed to load
+    """
+    view = _views.get(profile)
+    if view is not None:
+        return view
+    model = _model if _model is not None else _load_model()
+    if model is None:
+        return None
+    with _lock:
+        return _views.setdefault(profile, ModelView(model, PROFILES[profile]))
+
+
+def model_stats():
+    """Load status, load time and memory footprint of the shared model"""
+    return {"model": MODEL_NAME, **_stats}
+
+
+def get_stopwords(language="english"):
+    """
+    Shared stopword set for a language, loaded once per process.
+
+    Reads the NLTK corpus already installed on the machine; if it is missing,
+    falls back to spaCy's built-in English list instead of downloading.
+
+    Returns:
+        frozenset: Stopwords
+    """
+    words = _stopwords.get(language)
+    if words is not None:
+        return words
+    with _lock:
+        if language not in _stopwords:
+            try:
+                from nltk.corpus import stopwords
+                _stopwords[language] = frozenset(stopwords.words(language))
+            except LookupError:
+                from spacy.lang.en.stop_words import STOP_WORDS
+                logger.warning("⚠️ NLTK '%s' stopwords not installed, using spaCy's list (run build.sh to install them)", language)
+                _stopwords[language] = frozenset(STOP_WORDS)
+        return _stopwords[language]
@@ -0,0 +1,102 @@
+"""
+Token-level trie for matching key term phrases against a token sequence
+
+Compare it with the original per-position scan over every key term:
+
+    python backend/app/phrase_trie.py [--sizes 1000 10000 100000]
+"""
+
+_TERMINAL = object()
+
+
+class KeyTermTrie:
+    """Trie over the words of each key term, used to find the longest key term
+    starting at a token position in time proportional to the phrase length."""
+
+    def __init__(self, key_terms):
+        self._root = {}
+        for term in key_terms:
+            node = self._root
+            for word in term.split(' '):
+                node = node.setdefault(word, {})
+            node[_TERMINAL] = term
+
+    def longest_match(self, words, start):
+        """
+        Find the longest key term beginning at words[start].
+
+        Args:
+            words (list): Token texts of the document
+            start (int): Index of the first token to match
+
+        Returns:
+            tuple: (term, length) of the longest match, or (None, 0) if none matches
+        """
+        node = self._root
+        match = (None, 0)
+        for i in range(start, len(words)):
+            node = node.get(words[i])
+            if node is None:
+                break
+            if _TERMINAL in node:
+                match = (node[_TERMINAL], i - start + 1)
+        return match
+
+
+def _scan_match(words, start, key_terms):
+    """The original matcher: try every key term at the position (first match wins)"""
+    for term in key_terms:
+        term_words = term.split()
+        if start + len(term_words) <= len(words) and ' '.join(words[start:start + len(term_words)]) == term:
+            return term, len(term_words)
+    return None, 0
+
+
+def _synthetic_document(n_tokens, n_terms, seed=0):
+    """A token stream over a 5k-word vocabulary plus n_terms 1-3 word key terms drawn from it"""
+    import random
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    words = [rng.choice(vocabulary) for _ in range(n_tokens)]
+    key_terms = set()
+    while len(key_terms) < n_terms:
+        start = rng.randrange(n_tokens - 3)
+        key_terms.add(' '.join(words[start:start + rng.randint(1, 3)]))
+    return words, sorted(key_terms)
+
+
+def _tokenize(words, match):
+    tokens = []
+    i = 0
+    while i < len(words):
+        term, length = match(i)
+        if term is not None:
+            tokens.append(term)
+            i += length
+        else:
+            tokens.append(words[i])
+            i += 1
+    return tokens
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Benchmark key term matching: per-term scan vs. trie")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Document sizes in tokens")
+    parser.add_argument("--terms-per-1k", type=int, default=20, help="Key terms per 1000 tokens")
+    parser.add_argument("--max-terms", type=int, default=500, help="Cap on key terms per document")
+    args = parser.parse_args()
+
+    print(f"{'tokens':>8} {'terms':>6} {'scan ms':>10} {'trie ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        words, key_terms = _synthetic_document(size, min(args.max_terms, max(1, size * args.terms_per_1k // 1000)))
+        start = time.perf_counter()
+        _tokenize(words, lambda i: _scan_match(words, i, key_terms))
+        scan_seconds = time.perf_counter() - start
+        trie = KeyTermTrie(key_terms)
+        start = time.perf_counter()
+        _tokenize(words, lambda i: trie.longest_match(words, i))
+        trie_seconds = time.perf_counter() - start
+        print(f"{size:>8} {len(key_terms):>6} {scan_seconds * 1000:>10.1f} {trie_seconds * 1000:>9.1f} {scan_seconds / trie_seconds:>7.0f}x")
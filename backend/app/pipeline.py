@@ -0,0 +1,90 @@
+"""
+Small dependency graph of async request stages.
+
+Endpoints describe their work as named stages (text extraction, TF-IDF
+scoring, LLM assessment, ...) with the stages each one depends on. Every
+stage starts as soon as its dependencies finish, so independent stages such
+as the two PDF extractions, or TF-IDF scoring and the LLM call, overlap and
+the request takes roughly as long as its slowest path instead of the sum.
+"""
+import asyncio
+import json
+import time
+
+
+class StageGraph:
+    """Runs named async stages concurrently, respecting their dependencies."""
+
+    def __init__(self):
+        self._stages = {}  # name -> (stage function, dependency names)
+        self.timings = {}  # name -> seconds spent in the stage itself
+
+    def add(self, name, func, *deps):
+        """
+        Register a stage.
+
+        Args:
+            name (str): Stage name, also used in the Server-Timing header
+            func (callable): Async function called with the results of deps, in order
+            *deps (str): Names of stages that must finish first
+        """
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self._stages[name] = (func, deps)
+
+    async def _run_stage(self, name, tasks):
+        func, deps = self._stages[name]
+        args = [await tasks[dep] for dep in deps]
+        start = time.perf_counter()
+        try:
+            return await func(*args)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def _start(self):
+        tasks = {}
+        for name in self._stages:
+            tasks[name] = asyncio.ensure_future(self._run_stage(name, tasks))
+        return tasks
+
+    async def as_completed(self):
+        """
+        Run every stage and yield (name, result) as each one finishes.
+
+        Stages finishing together are yielded in the order they were added,
+        so a stage always comes after its dependencies. If a stage raises, the remaining stages are cancelled and the
+        exception propagates to the caller.
+        """
+        self._started = time.perf_counter()
+        tasks = self._start()
+        pending = set(tasks.values())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for name, task in tasks.items():
+                    if task in done:
+                        yield name, task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            # Settle every task so failures shared by dependent stages are not reported as unretrieved
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            self.timings["total"] = time.perf_counter() - self._started
+
+    async def run(self):
+        """Run every stage and return a dict of stage name -> result"""
+        return {name: result async for name, result in self.as_completed()}
+
+    def timings_ms(self):
+        """Stage durations in milliseconds"""
+        return {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()}
+
+    def server_timing(self):
+        """Stage durations formatted as a Server-Timing header value"""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.timings.items())
+
+
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
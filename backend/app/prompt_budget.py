@@ -0,0 +1,195 @@
+"""
+Token-aware budgeting of resume and job description text for LLM prompts.
+
+Instead of cutting documents at a fixed character offset, the text is split
+into sentences, each sentence is scored by how much TF-IDF signal it carries
+per token, and the best sentences are kept (in their original order) until
+the model's token budget is spent. Documents that already fit are sent
+unchanged.
+
+Tokens are counted with a local approximation of a BPE tokenizer, so no
+tokenizer download or network call is needed.
+
+    PROMPT_TOKEN_BUDGET   document tokens per prompt (overrides the per-model table)
+    LLM_INPUT_MAX_CHARS   characters of a resume or job description considered for a prompt;
+                          uploads are extracted only that far for the LLM stage
+
+Measure the reduction on sample documents:
+
+    python backend/app/prompt_budget.py <resume.pdf|.txt> [...] [--budget N]
+"""
+import math
+import os
+import re
+from collections import Counter
+
+# Document-text tokens allowed per prompt, by model; the instructions and the
+# completion come on top of this
+MODEL_TOKEN_BUDGETS = {
+    "llama-3.1-8b-instant": 1200,
+}
+DEFAULT_TOKEN_BUDGET = 1200
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 0)) or None
+# Roughly 3x the default budget in characters, leaving the budgeter sentences to choose from
+LLM_INPUT_MAX_CHARS = int(os.getenv("LLM_INPUT_MAX_CHARS", 16000))
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_WORD_RE = re.compile(r"\w+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+MAX_SEGMENT_WORDS = 40  # Extracted resumes have few full stops, so long runs are split into chunks
+
+
+def count_tokens(text):
+    """
+    Approximate the number of BPE tokens in a text.
+
+    Short words count as one token, longer words as one token per ~6
+    characters, digit runs as one token per 3 digits, and every other
+    symbol as one token.
+    """
+    total = 0
+    for piece in _TOKEN_RE.findall(text):
+        if piece[0].isalpha():
+            total += 1 if len(piece) <= 8 else 1 + math.ceil((len(piece) - 8) / 6)
+        elif piece[0].isdigit():
+            total += math.ceil(len(piece) / 3)
+        else:
+            total += 1
+    return total
+
+
+def token_budget(model):
+    """Document-token budget for a model (PROMPT_TOKEN_BUDGET wins when set)"""
+    return PROMPT_TOKEN_BUDGET or MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+
+
+def split_sentences(text):
+    """Split text into sentences, chunking runs longer than MAX_SEGMENT_WORDS"""
+    segments = []
+    for sentence in _SENTENCE_END_RE.split(text.strip()):
+        words = sentence.split()
+        for start in range(0, len(words), MAX_SEGMENT_WORDS):
+            segments.append(" ".join(words[start:start + MAX_SEGMENT_WORDS]))
+    return segments
+
+
+def _tfidf_word_weights(tfidf_scores):
+    """Spread TF-IDF scores of (possibly multi-word) terms onto their words"""
+    weights = {}
+    for term, score in tfidf_scores.items():
+        for word in term.lower().split():
+            if score > weights.get(word, 0.0):
+                weights[word] = score
+    return weights
+
+
+def _lexical_word_weights(sentence_words):
+    """
+    Fallback weights when no TF-IDF scores are available: TF-IDF computed
+    over the document's own sentences, so words found in every sentence
+    (stopwords, boilerplate) weigh little and distinctive ones weigh most.
+    """
+    n = len(sentence_words)
+    document_frequency = Counter(word for words in sentence_words for word in set(words))
+    term_frequency = Counter(word for words in sentence_words for word in words)
+    return {
+        word: (1 + math.log(term_frequency[word])) * math.log((1 + n) / (1 + df))
+        for word, df in document_frequency.items()
+    }
+
+
+def budget_text(text, max_tokens, tfidf_scores=None):
+    """
+    Reduce a document to at most max_tokens tokens, keeping its most informative sentences.
+
+    Args:
+        text (str): Resume or job description text
+        max_tokens (int): Token budget for this document
+        tfidf_scores (dict, optional): Term -> TF-IDF score from SimpleTFIDF; a
+            lexical scorer over the document's own sentences is used when omitted
+
+    Returns:
+        str: The text unchanged if it fits, otherwise the selected sentences in original order
+    """
+    if not text or count_tokens(text) <= max_tokens:
+        return text
+
+    sentences = split_sentences(text)
+    sentence_words = [_WORD_RE.findall(sentence.lower()) for sentence in sentences]
+    if tfidf_scores:
+        weights = _tfidf_word_weights(tfidf_scores)
+    else:
+        weights = _lexical_word_weights(sentence_words)
+
+    candidates = []
+    for index, (sentence, words) in enumerate(zip(sentences, sentence_words)):
+        tokens = count_tokens(sentence)
+        score = sum(weights.get(word, 0.0) for word in set(words))
+        candidates.append((score / max(tokens, 1), index, tokens))
+
+    # Greedily keep the densest sentences that still fit
+    selected = []
+    used = 0
+    for _, index, tokens in sorted(candidates, key=lambda x: (-x[0], x[1])):
+        if used + tokens <= max_tokens:
+            selected.append(index)
+            used += tokens
+    return " ".join(sentences[index] for index in sorted(selected))
+
+
+def budget_documents(documents, max_tokens):
+    """
+    Share one token budget between several documents (e.g. resume and job description).
+
+    Documents smaller than their fair share keep all their tokens and the
+    remainder is split among the larger ones.
+
+    Args:
+        documents (list): (text, tfidf_scores or None) pairs
+        max_tokens (int): Total token budget
+
+    Returns:
+        list: Budgeted texts, in the same order
+    """
+    sizes = [count_tokens(text or "") for text, _ in documents]
+    allowances = [0] * len(documents)
+    remaining = max_tokens
+    pending = sorted(range(len(documents)), key=lambda i: sizes[i])
+    while pending:
+        share = remaining // len(pending)
+        i = pending.pop(0)
+        allowances[i] = min(sizes[i], share)
+        remaining -= allowances[i]
+    return [budget_text(text, allowance, scores) for (text, scores), allowance in zip(documents, allowances)]
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Measure prompt-size reduction from token budgeting")
+    parser.add_argument("paths", nargs="+", help="Resume/job description .pdf or .txt files")
+    parser.add_argument("--budget", type=int, default=token_budget("llama-3.1-8b-instant"), help="Token budget")
+    parser.add_argument("--no-tfidf", action="store_true", help="Score sentences with the lexical fallback only")
+    args = parser.parse_args()
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+    from backend.utils.pdf_parser import textextractionfunction
+
+    analyzer = None
+    if not args.no_tfidf:
+        from simple_tfidf import SimpleTFIDF
+        analyzer = SimpleTFIDF()
+
+    print(f"{'document':40} {'chars':>8} {'tokens':>8} {'budgeted':>9} {'reduction':>10}")
+    for path in args.paths:
+        if path.lower().endswith(".pdf"):
+            text = textextractionfunction(path)
+        else:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+        scores = analyzer.analyze(text).tfidf if analyzer else None
+        budgeted = budget_text(text, args.budget, scores)
+        before, after = count_tokens(text), count_tokens(budgeted)
+        reduction = 100 * (1 - after / before) if before else 0.0
+        print(f"{os.path.basename(path)[:40]:40} {len(text):>8} {before:>8} {after:>9} {reduction:>9.1f}%")
@@ -1,114 +1,153 @@
 """
 Simple TF-IDF implementation without scikit-learn dependency
+
+Measure the per-call overhead removed by the shared analyzer:
+
+    python backend/app/simple_tfidf.py [--number 2000]
 """
+import logging
 import re
-import math
-import nltk
-import spacy
+import threading
 from collections import Counter
-from nltk.corpus import stopwords
-
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
-
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm", disable=["parser"])
-    print("✅ spaCy model loaded successfully in SimpleTFIDF")
-except OSError:
-    print("⚠️ spaCy model not found in SimpleTFIDF, attempting to download...")
-    try:
-        import subprocess
-        import sys
-        subprocess.check_call([sys.executable, "-m", "spacy", "download", "en_core_web_sm"])
-        nlp = spacy.load("en_core_web_sm", disable=["parser"])
-        print("✅ spaCy model downloaded and loaded successfully in SimpleTFIDF")
-    except Exception as e:
-        print(f"❌ Failed to download spaCy model in SimpleTFIDF: {str(e)}")
-        nlp = None
-except Exception as e:
-    print(f"❌ Failed to load spaCy model in SimpleTFIDF: {str(e)}")
-    nlp = None
+from phrase_trie import KeyTermTrie
+from nlp_models import get_nlp, get_stopwords
+from idf_table import get_default_idf_table
+from sparse_vectors import cosine_similarities
+from telemetry import span
+
+# Entity labels whose tokens and noun chunks are dropped (names, employers, places)
+EXCLUDED_ENTITY_LABELS = frozenset({'PERSON', 'ORG', 'GPE'})
+NON_ALPHA_RE = re.compile(r'[^a-zA-Z\s]')
+# Highest heuristic IDF (noun phrases), see SimpleTFIDF.assign_idf_score
+MAX_HEURISTIC_IDF = 2.0
+
+logger = logging.getLogger(__name__)
+
+_default_analyzer = None
+_default_lock = threading.Lock()
 
 class SimpleTFIDF:
-    def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
+    """TF-IDF scorer. Holds only shared, read-only resources (stopwords, IDF
+    table) and keeps no per-call state, so one instance can serve every
+    request and thread; see get_analyzer."""
+
+    def __init__(self, idf_table=None):
+        """``idf_table`` is an optional IDFTable; when given, in-vocabulary terms
+        get their corpus IDF and out-of-vocabulary terms fall back to the
+        heuristic, rescaled below the table's range (see compute_tf_idf)."""
+        self.stop_words = get_stopwords()
+        self.idf_table = idf_table
 
     def extract_key_terms(self, text):
         """Extract domain-specific key terms (noun phrases) from text"""
         try:
-            doc = nlp(text.lower())
+            return self._key_terms_from_doc(get_nlp()(text.lower()))
+        except Exception as e:
+            logger.warning("Key term extraction failed: %s", e)
+            return set()
+
+    def _key_terms_from_doc(self, doc):
+        """Collect key terms (noun phrases) from an already parsed spaCy Doc"""
+        if not doc.has_annotation("DEP"):
+            # Noun chunks need the parser, which the default profile leaves out
+            logger.debug("No dependency parse, skipping key term extraction")
+            return set()
+        try:
             key_terms = set()
             for chunk in doc.noun_chunks:
                 term = chunk.text.strip()
                 # Limit to 1-3 words, exclude proper nouns, and cap character length
-                if 1 <= len(term.split()) <= 3 and all(token.ent_type_ not in ['PERSON', 'ORG', 'GPE'] for token in chunk) and len(term.replace(' ', '')) <= 30:
+                if 1 <= len(term.split()) <= 3 and all(token.ent_type_ not in EXCLUDED_ENTITY_LABELS for token in chunk) and len(term.replace(' ', '')) <= 30:
                     key_terms.add(term)
-            print(f"DEBUG - Extracted key terms: {list(key_terms)[:10]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Extracted key terms: %s...", list(key_terms)[:10])
             return key_terms
         except Exception as e:
-            print(f"DEBUG - Key term extraction failed: {str(e)}")
+            logger.warning("Key term extraction failed: %s", e)
             return set()
 
-    def assign_idf_score(self, term):
-        """Assign heuristic IDF score based on term characteristics"""
+    def assign_idf_score(self, term, pos=None):
+        """Assign heuristic IDF score based on term characteristics.
+
+        ``pos`` is the term's coarse POS tag when the caller already tagged it
+        (e.g. in a tag_terms batch); otherwise the term is tagged on its own.
+        """
         try:
             if len(term.split()) > 1:
-                return 2.0  # Noun phrases
-            elif nlp(term)[0].pos_ in ['NOUN', 'PROPN']:
+                return MAX_HEURISTIC_IDF  # Noun phrases
+            if pos is None:
+                pos = get_nlp("tagger")(term)[0].pos_
+            if pos in ['NOUN', 'PROPN']:
                 return 1.5  # Single nouns
             return 0.5  # Other terms
         except Exception:
             return 0.5  # Fallback for safety
 
+    def tag_terms(self, terms):
+        """Tag single-word terms in one nlp.pipe batch and return {term: pos}.
+
+        Each term is tagged on its own, not in document context, so the tags
+        (and the 1.5/0.5 weights) are the ones a per-term nlp(term) call gives.
+        """
+        terms = [term for term in terms if len(term.split()) == 1]
+        if not terms:
+            return {}
+        try:
+            return {term: doc[0].pos_ for term, doc in zip(terms, get_nlp("tagger").pipe(terms)) if len(doc)}
+        except Exception as e:
+            logger.warning("Batch POS tagging failed: %s", e)
+            return {}
+
     def preprocess_text(self, text):
         """Clean and tokenize text with dynamic key term handling"""
+        return self._tokenize(text)
+
+    def _normalize(self, text):
+        """Validate and clean raw text before parsing; returns None if unusable"""
         if not text or not isinstance(text, str):
-            print("DEBUG - Input text is empty or invalid")
-            return []
-        
+            logger.debug("Input text is empty or invalid")
+            return None
+
         # Convert to lowercase and remove special characters
-        text = re.sub(r'[^a-zA-Z\s]', '', text.lower())
+        return NON_ALPHA_RE.sub('', text.lower())
 
-        # Extract key terms
-        key_terms = self.extract_key_terms(text)
-        
-        # Tokenize with spaCy
+    def _tokenize(self, text):
+        """Tokenize text, keeping key terms (noun phrases) as single tokens"""
+        text = self._normalize(text)
+        if text is None:
+            return []
+
+        # Parse once; the same Doc feeds key term extraction and tokenization
         try:
-            doc = nlp(text)
+            doc = get_nlp()(text)
         except Exception as e:
-            print(f"DEBUG - spaCy tokenization failed: {str(e)}")
+            logger.warning("spaCy tokenization failed: %s", e)
             return []
-        
-        # Preserve key terms
+
+        return self._tokenize_doc(doc)
+
+    def _tokenize_doc(self, doc):
+        """Tokenize a parsed Doc; see _tokenize"""
+        # Extract key terms
+        key_terms = self._key_terms_from_doc(doc)
+
+        # Preserve key terms, preferring the longest phrase at each position
+        trie = KeyTermTrie(key_terms)
+        words = [token.text for token in doc]
         tokens = []
         i = 0
         while i < len(doc):
-            found_term = False
-            for term in key_terms:
-                term_words = term.split()
-                term_length = len(term_words)
-                if i + term_length <= len(doc):
-                    if ' '.join([doc[i + j].text for j in range(term_length)]) == term:
-                        tokens.append(term)
-                        i += term_length
-                        found_term = True
-                        break
-            if not found_term:
+            term, term_length = trie.longest_match(words, i)
+            if term is not None:
+                tokens.append(term)
+                i += term_length
+            else:
                 token = doc[i]
-                if token.ent_type_ not in ['PERSON', 'ORG', 'GPE'] and len(token.text) > 2 and token.text not in self.stop_words:
+                if token.ent_type_ not in EXCLUDED_ENTITY_LABELS and len(token.text) > 2 and token.text not in self.stop_words:
                     tokens.append(token.text)
                 i += 1
         
-        print(f"DEBUG - Preprocessed tokens: {tokens[:20]}...")
+        logger.debug("Preprocessed tokens: %s...", tokens[:20])
         return tokens
 
     def compute_tf(self, tokens):
@@ -135,71 +174,133 @@ class SimpleTFIDF:
         return tf_dict
 
     def compute_tf_idf(self, tokens):
-        """Compute TF-IDF with heuristic IDF scores"""
+        """Compute TF-IDF with corpus IDF values where available, else heuristic scores.
+
+        Single-word terms that need the heuristic are POS-tagged in one batch.
+        With a table loaded, heuristic scores are rescaled so the highest
+        (2.0, noun phrases) equals the table's lowest IDF: a term the corpus
+        never kept (OCR noise, typos, terms under --min-df) never outranks one
+        it did.
+        """
         tf_dict = self.compute_tf(tokens)
         tfidf_dict = {}
-        
+
+        corpus_idf = {}
+        heuristic_scale = 1.0
+        if self.idf_table is not None:
+            for token in tf_dict:
+                idf = self.idf_table.get(token)
+                if idf is not None:
+                    corpus_idf[token] = idf
+            heuristic_scale = self.idf_table.min_idf / MAX_HEURISTIC_IDF
+
+        pos_tags = self.tag_terms([token for token in tf_dict if token not in corpus_idf])
+
         for token in tf_dict:
-            idf = self.assign_idf_score(token)
+            idf = corpus_idf.get(token)
+            if idf is None:
+                idf = self.assign_idf_score(token, pos=pos_tags.get(token, '')) * heuristic_scale
             tfidf_dict[token] = tf_dict[token] * idf
         
         return tfidf_dict
 
-    def get_top_keywords(self, text, top_n=20):
-        """Get top keywords with TF-IDF"""
-        tokens = self.preprocess_text(text)
-        if not tokens:
-            print("DEBUG - No tokens after preprocessing")
-            return {}
-        
-        tfidf_scores = self.compute_tf_idf(tokens)
-        
-        # Filter out long concatenated terms
-        tfidf_scores = {k: v for k, v in tfidf_scores.items() if len(k.replace(' ', '')) <= 30}
-        
-        # Sort by TF-IDF score and return top N
-        sorted_scores = sorted(tfidf_scores.items(), key=lambda x: x[1], reverse=True)
-        return dict(sorted_scores[:top_n])
+    def analyze(self, text):
+        """Tokenize and score a document once; see DocumentAnalysis"""
+        with span("preprocess"):
+            tokens = self._tokenize(text)
+        with span("score"):
+            return DocumentAnalysis(tokens, self.compute_tf_idf(tokens))
 
-    def cosine_similarity(self, doc1_tfidf, doc2_tfidf):
-        """Compute cosine similarity between two TF-IDF vectors"""
-        if not doc1_tfidf or not doc2_tfidf:
-            print("DEBUG - One or both TF-IDF dictionaries are empty")
-            return 0.0
+    def analyze_many(self, texts, n_process=1, batch_size=32):
+        """
+        Analyze many documents, streaming them through nlp.pipe.
 
-        # Get all unique terms
-        all_terms = set(doc1_tfidf.keys()) | set(doc2_tfidf.keys())
+        Args:
+            texts (list): Raw document texts
+            n_process (int): Worker processes used by nlp.pipe
+            batch_size (int): Documents per nlp.pipe batch
 
-        # Create vectors
-        vec1 = [doc1_tfidf.get(term, 0) for term in all_terms]
-        vec2 = [doc2_tfidf.get(term, 0) for term in all_terms]
+        Returns:
+            list: One DocumentAnalysis per input text, in input order
+        """
+        normalized = [self._normalize(text) for text in texts]
+        analyses = [DocumentAnalysis([], {}) for _ in texts]
+        indices = [i for i, text in enumerate(normalized) if text is not None]
+        tokenized = []
+        with span("preprocess"):
+            try:
+                docs = get_nlp().pipe((normalized[i] for i in indices), n_process=n_process, batch_size=batch_size)
+                for i, doc in zip(indices, docs):
+                    tokenized.append((i, self._tokenize_doc(doc)))
+            except Exception as e:
+                logger.warning("spaCy batch tokenization failed: %s", e)
+        with span("score"):
+            for i, tokens in tokenized:
+                analyses[i] = DocumentAnalysis(tokens, self.compute_tf_idf(tokens))
+        return analyses
 
-        # Compute dot product
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
+    def analyze_stream(self, chunks, batch_size=4):
+        """
+        Analyze one document that arrives as a stream of text chunks, such as
+        pdf_parser.iter_pdf_pages. Chunks are parsed as they are produced
+        (batch_size at a time), so extraction and NLP overlap.
 
-        # Compute magnitudes
-        magnitude1 = math.sqrt(sum(a * a for a in vec1))
-        magnitude2 = math.sqrt(sum(b * b for b in vec2))
+        Returns:
+            DocumentAnalysis: Analysis of the concatenated chunks
+        """
+        tokens = []
+        texts = (self._normalize(chunk) for chunk in chunks if chunk and isinstance(chunk, str))
+        with span("preprocess"):
+            try:
+                for doc in get_nlp().pipe(texts, batch_size=batch_size):
+                    tokens.extend(self._tokenize_doc(doc))
+            except Exception as e:
+                logger.warning("spaCy stream tokenization failed: %s", e)
+        with span("score"):
+            return DocumentAnalysis(tokens, self.compute_tf_idf(tokens))
 
-        # Avoid division by zero
-        if magnitude1 == 0 or magnitude2 == 0:
-            print("DEBUG - Zero magnitude in cosine similarity")
+    def get_top_keywords(self, text, top_n=20):
+        """Get top keywords with TF-IDF"""
+        return self.analyze(text).top_keywords(top_n)
+
+    def cosine_similarity(self, doc1_tfidf, doc2_tfidf):
+        """Compute cosine similarity between two TF-IDF vectors"""
+        if not doc1_tfidf or not doc2_tfidf:
+            logger.debug("One or both TF-IDF dictionaries are empty")
             return 0.0
 
-        return dot_product / (magnitude1 * magnitude2)
+        return float(cosine_similarities(doc1_tfidf, [doc2_tfidf])[0])
 
     def compare_documents(self, doc1, doc2):
         """Compare two documents and return similarity metrics"""
-        # Get TF-IDF scores for both documents
-        tokens1 = self.preprocess_text(doc1)
-        tokens2 = self.preprocess_text(doc2)
+        return self.compare_analyses(self.analyze(doc1), self.analyze(doc2))
 
-        tfidf1 = self.compute_tf_idf(tokens1)
-        tfidf2 = self.compute_tf_idf(tokens2)
+    def compare_analyses(self, analysis1, analysis2):
+        """Compare two already analyzed documents and return similarity metrics"""
+        with span("similarity"):
+            similarity = self.cosine_similarity(analysis1.tfidf, analysis2.tfidf)
+            return self._comparison(analysis1.tfidf, analysis2.tfidf, similarity)
 
-        # Calculate similarity
-        similarity = self.cosine_similarity(tfidf1, tfidf2)
+    def compare_many(self, analyses, reference):
+        """Compare many analyzed documents against one reference document.
 
+        All similarities come from a single sparse matrix-vector product; each
+        result matches compare_analyses(analysis, reference).
+        """
+        if not analyses:
+            return []
+        with span("similarity"):
+            if reference.tfidf:
+                similarities = cosine_similarities(reference.tfidf, [analysis.tfidf for analysis in analyses])
+            else:
+                similarities = [0.0] * len(analyses)
+            return [
+                self._comparison(analysis.tfidf, reference.tfidf, float(similarity))
+                for analysis, similarity in zip(analyses, similarities)
+            ]
+
+    def _comparison(self, tfidf1, tfidf2, similarity):
+        """Similarity metrics for two TF-IDF vectors whose cosine similarity is known"""
         # Find common keywords
         common_terms = set(tfidf1.keys()) & set(tfidf2.keys())
         common_keywords = []
@@ -218,4 +319,70 @@ class SimpleTFIDF:
         return {
             'similarity_score': similarity,
             'common_keywords': common_keywords[:10],  # Top 10 common keywords
-        }
\ No newline at end of file
+        }
+
+
+def get_analyzer():
+    """Process-wide SimpleTFIDF bound to the default IDF table, created on first use"""
+    global _default_analyzer
+    if _default_analyzer is None:
+        with _default_lock:
+            if _default_analyzer is None:
+                _default_analyzer = SimpleTFIDF(idf_table=get_default_idf_table())
+    return _default_analyzer
+
+
+class DocumentAnalysis:
+    """Tokens and TF-IDF scores of one document, computed once and shared by
+    keyword extraction and document comparison."""
+
+    def __init__(self, tokens, tfidf):
+        self.tokens = tokens
+        self.tfidf = tfidf
+
+    def top_keywords(self, top_n=20):
+        """Get top keywords with TF-IDF"""
+        if not self.tokens:
+            logger.debug("No tokens after preprocessing")
+            return {}
+
+        # Filter out long concatenated terms
+        tfidf_scores = {k: v for k, v in self.tfidf.items() if len(k.replace(' ', '')) <= 30}
+
+        # Sort by TF-IDF score and return top N
+        sorted_scores = sorted(tfidf_scores.items(), key=lambda x: x[1], reverse=True)
+        return dict(sorted_scores[:top_n])
+
+
+if __name__ == "__main__":
+    import argparse
+    import timeit
+
+    parser = argparse.ArgumentParser(description="Benchmark the per-call overhead removed by the shared analyzer")
+    parser.add_argument("--number", type=int, default=2000, help="Calls timed per row")
+    args = parser.parse_args()
+
+    sample = "Senior Python developer building data pipelines with SQL, Airflow and machine learning. " * 5
+    labels = ['PERSON', 'ORG', 'GPE']
+
+    def fresh_analyzer():
+        """What each request used to do: build an analyzer, re-reading the NLTK stopword list"""
+        from nltk.corpus import stopwords
+        analyzer = SimpleTFIDF.__new__(SimpleTFIDF)
+        analyzer.stop_words = set(stopwords.words('english'))
+        analyzer.idf_table = None
+        return analyzer
+
+    rows = [
+        ("analyzer per call", fresh_analyzer, get_analyzer),
+        ("entity label check", lambda: 'NORP' not in labels, lambda: 'NORP' not in EXCLUDED_ENTITY_LABELS),
+        ("non-alpha strip", lambda: re.sub(r'[^a-zA-Z\s]', '', sample.lower()), lambda: NON_ALPHA_RE.sub('', sample.lower())),
+    ]
+    get_analyzer()  # Load shared resources before timing
+    print(f"{'overhead':20} {'before us':>10} {'after us':>9} {'saved us':>9}")
+    for name, before, after in rows:
+        before_us = timeit.timeit(before, number=args.number) / args.number * 1e6
+        after_us = timeit.timeit(after, number=args.number) / args.number * 1e6
+        print(f"{name:20} {before_us:>10.2f} {after_us:>9.2f} {before_us - after_us:>9.2f}")
+    analyze_us = timeit.timeit(lambda: get_analyzer().analyze(sample), number=max(1, args.number // 100))
+    print(f"(for scale: analyze() of a {len(sample)}-char text takes {analyze_us / max(1, args.number // 100) * 1e6:.0f} us)")
@@ -0,0 +1,73 @@
+"""
+Sparse TF-IDF vectors and batched cosine similarity.
+
+Documents are stored as interned term IDs plus NumPy value arrays, and the
+similarity of one query against N documents is computed as a single sparse
+matrix-vector product over a CSR layout.
+"""
+import numpy as np
+
+
+class TermIndex:
+    """Interns terms to consecutive integer IDs."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def intern(self, term):
+        term_id = self.ids.get(term)
+        if term_id is None:
+            term_id = self.ids[term] = len(self.ids)
+        return term_id
+
+
+class SparseMatrix:
+    """Rows of TF-IDF dictionaries in CSR form (indptr, indices, data)."""
+
+    def __init__(self, rows, index):
+        lengths = [len(row) for row in rows]
+        self.n_rows = len(rows)
+        self.indptr = np.zeros(self.n_rows + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        self.indices = np.fromiter(
+            (index.intern(term) for row in rows for term in row), dtype=np.int64, count=int(self.indptr[-1])
+        )
+        self.data = np.fromiter(
+            (value for row in rows for value in row.values()), dtype=np.float64, count=int(self.indptr[-1])
+        )
+        self._row_ids = np.repeat(np.arange(self.n_rows), lengths)
+
+    def dot(self, vector):
+        """Matrix-vector product with a dense vector indexed by term ID"""
+        return np.bincount(self._row_ids, weights=self.data * vector[self.indices], minlength=self.n_rows)
+
+    def row_norms(self):
+        return np.sqrt(np.bincount(self._row_ids, weights=self.data * self.data, minlength=self.n_rows))
+
+
+def cosine_similarities(query_tfidf, docs_tfidf):
+    """
+    Cosine similarity of one TF-IDF dictionary against many.
+
+    Args:
+        query_tfidf (dict): Term -> TF-IDF score of the query document
+        docs_tfidf (list): Term -> TF-IDF score dictionaries of the other documents
+
+    Returns:
+        numpy.ndarray: One similarity per document (0.0 where either vector is zero)
+    """
+    index = TermIndex()
+    query_ids = np.fromiter((index.intern(term) for term in query_tfidf), dtype=np.int64, count=len(query_tfidf))
+    query_values = np.fromiter(query_tfidf.values(), dtype=np.float64, count=len(query_tfidf))
+    matrix = SparseMatrix(docs_tfidf, index)
+
+    query = np.zeros(len(index), dtype=np.float64)
+    query[query_ids] = query_values
+    query_norm = np.sqrt(np.dot(query_values, query_values))
+
+    denominators = matrix.row_norms() * query_norm
+    dots = matrix.dot(query)
+    return np.divide(dots, denominators, out=np.zeros(matrix.n_rows), where=denominators != 0)
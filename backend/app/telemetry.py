@@ -0,0 +1,241 @@
+"""
+Logging setup and per-request span timings.
+
+configure_logging() sends every record through a QueueHandler to a
+QueueListener thread that does the formatting and the write to stdout, so a
+request never blocks on the stream. Records below LOG_LEVEL are dropped by a
+cached level check before their message is built; modules log with
+``logger.debug("... %s", value)`` so a disabled debug line never formats its
+arguments, and guard anything costly to compute with
+``logger.isEnabledFor(logging.DEBUG)``.
+
+span(name) times a block of work and adds it to the current request's trace
+(concurrent spans with the same name are summed). The stages recorded are
+extract, preprocess, score, similarity and llm. Work submitted to the worker
+pools runs under run_traced, which hands the spans recorded in the worker
+process or thread back to the request that submitted it.
+
+    LOG_LEVEL    DEBUG, INFO, WARNING or ERROR
+    LOG_FORMAT   text, or json for one JSON object per line
+"""
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# Chatty third-party loggers kept at WARNING whatever LOG_LEVEL is
+QUIET_LOGGERS = ("httpx", "httpcore", "openai", "pdfminer", "PIL", "urllib3", "multipart")
+
+_request_id = contextvars.ContextVar("request_id", default="-")
+_trace = contextvars.ContextVar("trace", default=None)
+
+_listener = None
+_queue_handler = None
+_configure_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+class _RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (runs in the thread that logged, where the context is)"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """``time level logger [request id] message key=value ...``"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{key}={json.dumps(value)}" for key, value in fields.items())
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with any ``extra={"fields": {...}}`` merged in"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    """
+    Route logging through a queue to a background writer. Safe to call more
+    than once per process; each process (including pool workers) gets its own
+    listener thread.
+    """
+    global _queue_handler
+    with _configure_lock:
+        if _queue_handler is not None:
+            return
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else TextFormatter())
+        _queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+        _queue_handler.addFilter(_RequestIdFilter())
+
+        root = logging.getLogger()
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_queue_handler)
+        for name in QUIET_LOGGERS:
+            logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+
+        _start_listener(stream_handler)
+        atexit.register(_stop_listener)
+        if hasattr(os, "register_at_fork"):
+            # The listener thread doesn't survive fork (gunicorn preload_app); give each child its own
+            os.register_at_fork(after_in_child=lambda: _start_listener(*_listener.handlers))
+
+
+def _start_listener(*handlers):
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    """Flush queued records on interpreter exit"""
+    if _listener is not None:
+        _listener.stop()
+
+
+class RequestTrace:
+    """Span durations (seconds) recorded while serving one request."""
+
+    def __init__(self, request_id=None):
+        self.request_id = request_id or uuid.uuid4().hex[:12]
+        self.spans = {}
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def merge(self, spans):
+        for name, seconds in spans.items():
+            self.add(name, seconds)
+
+    def spans_ms(self):
+        """Span durations in milliseconds"""
+        return {name: round(seconds * 1000, 1) for name, seconds in self.spans.items()}
+
+    def server_timing(self):
+        """Spans as a Server-Timing header value, prefixed to keep them apart from stage timings"""
+        return ", ".join(f"span.{name};dur={seconds * 1000:.1f}" for name, seconds in self.spans.items())
+
+
+@contextmanager
+def request_trace(request_id=None):
+    """Make a new RequestTrace current for the enclosed block (and tasks it starts)"""
+    trace = RequestTrace(request_id)
+    trace_token = _trace.set(trace)
+    id_token = _request_id.set(trace.request_id)
+    try:
+        yield trace
+    finally:
+        _trace.reset(trace_token)
+        _request_id.reset(id_token)
+
+
+def current_trace():
+    """The RequestTrace being recorded, or None outside a request"""
+    return _trace.get()
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block and add it to the current trace under ``name``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        trace = _trace.get()
+        if trace is not None:
+            trace.add(name, seconds)
+        logger.debug("span %s took %.1fms", name, seconds * 1000)
+
+
+def run_traced(request_id, fn, *args, **kwargs):
+    """
+    Run fn under a fresh trace (in a pool worker) and return (result, spans).
+
+    Pool workers don't share the submitting request's context, so the spans
+    recorded there travel back with the result and are merged by the caller.
+    """
+    with request_trace(request_id) as trace:
+        return fn(*args, **kwargs), trace.spans
+
+
+def _call_in_span(name, fn, *args, **kwargs):
+    with span(name):
+        return fn(*args, **kwargs)
+
+
+def traced(name, fn):
+    """Wrap fn so each call is recorded as span ``name``; picklable for the process pool"""
+    return functools.partial(_call_in_span, name, fn)
+
+
+class RequestTraceMiddleware:
+    """
+    ASGI middleware giving each HTTP request its own trace.
+
+    Adds X-Request-ID and the spans finished before the response starts (all
+    of them for JSON endpoints) to the Server-Timing header, and logs one
+    summary line with every span once the response body has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+        with request_trace() as trace:
+            async def send_with_trace(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-request-id", trace.request_id.encode()))
+                    if trace.spans:
+                        headers.append((b"server-timing", trace.server_timing().encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                logger.info(
+                    "%s %s %d %.1fms", scope["method"], scope["path"], status, (time.perf_counter() - start) * 1000,
+                    extra={"fields": {"spans_ms": trace.spans_ms()}}
+                )
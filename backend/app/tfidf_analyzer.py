@@ -1,12 +1,16 @@
 import re
-import json
-import nltk
-import spacy
-from nltk.corpus import stopwords
 import os
+import logging
 from openai import OpenAI
 from dotenv import load_dotenv
-from simple_tfidf import SimpleTFIDF
+from simple_tfidf import get_analyzer, EXCLUDED_ENTITY_LABELS
+from phrase_trie import KeyTermTrie
+from nlp_models import get_nlp
+from llm_cache import cached_completion
+from llm_json import parse_llm_json
+from prompt_budget import budget_text, budget_documents, token_budget
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables from root directory
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
@@ -14,79 +18,63 @@ load_dotenv(os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
 # Note: GROQ client is initialized dynamically with user-provided API keys
 # No static client initialization needed since we use dynamic API keys
 client = None  # Placeholder for dynamic client initialization
-print("✅ GROQ client will be initialized dynamically with user-provided API keys")
-
-# Download NLTK data
-nltk.download('stopwords', quiet=True)
-nltk.download('punkt', quiet=True)
-
-# Load spaCy model for NER and noun chunking
-try:
-    nlp = spacy.load("en_core_web_sm", disable=["parser"])
-    print("✅ spaCy model loaded successfully")
-except OSError:
-    print("⚠️ spaCy model not found, attempting to download...")
-    try:
-        import subprocess
-        import sys
-        subprocess.check_call([sys.executable, "-m", "spacy", "download", "en_core_web_sm"])
-        nlp = spacy.load("en_core_web_sm", disable=["parser"])
-        print("✅ spaCy model downloaded and loaded successfully")
-    except Exception as e:
-        print(f"❌ Failed to download spaCy model: {str(e)}")
-        nlp = None
-except Exception as e:
-    print(f"❌ Failed to load spaCy model: {str(e)}")
-    nlp = None
+logger.info("✅ GROQ client will be initialized dynamically with user-provided API keys")
+
+# nlp.pipe settings for batch resume ranking
+BATCH_N_PROCESS = int(os.getenv("BATCH_N_PROCESS", 1))
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", 32))
+
+# Minimal stopword list used by preprocess_text
+MINIMAL_STOPWORDS = frozenset({
+    'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+    'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after', 'above',
+    'below', 'between', 'among', 'this', 'that', 'these', 'those', 'is', 'was', 'are',
+    'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
+    'would', 'could', 'should', 'may', 'might', 'must', 'can', 'shall'
+})
+
+# Patterns used by preprocess_text, compiled once
+WHITESPACE_RE = re.compile(r'\s+')
+SPECIAL_CHARS_RE = re.compile(r'[^a-zA-Z0-9\s\-]')
+YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
 
 def preprocess_text(text):
     """Enhanced preprocessing to extract domain-specific terms and remove irrelevant entities"""
     if not text or not isinstance(text, str):
-        print("DEBUG - Input text is empty or invalid")
+        logger.debug("Input text is empty or invalid")
         return ""
     
     # Convert to lowercase
     text = text.lower()
     
     # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = WHITESPACE_RE.sub(' ', text).strip()
     
     # Remove special characters but keep letters, numbers, spaces, and hyphens
-    text = re.sub(r'[^a-zA-Z0-9\s\-]', ' ', text)
+    text = SPECIAL_CHARS_RE.sub(' ', text)
     
     # Remove standalone years (2020, 2021, etc.)
-    text = re.sub(r'\b(19|20)\d{2}\b', '', text)
+    text = YEAR_RE.sub('', text)
     
+    # Shared spaCy model (tagger + NER), loaded on first use
+    nlp = get_nlp()
+
     # If spaCy is not available, use basic preprocessing
     if nlp is None:
-        print("DEBUG - spaCy not available, using basic preprocessing")
+        logger.warning("spaCy not available, using basic preprocessing")
         # Basic tokenization and stopword removal
         words = text.split()
-        minimal_stopwords = {
-            'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
-            'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after', 'above',
-            'below', 'between', 'among', 'this', 'that', 'these', 'those', 'is', 'was', 'are',
-            'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-            'would', 'could', 'should', 'may', 'might', 'must', 'can', 'shall'
-        }
-        filtered_words = [word for word in words if word not in minimal_stopwords and len(word) > 2]
+        filtered_words = [word for word in words if word not in MINIMAL_STOPWORDS and len(word) > 2]
         return ' '.join(filtered_words)
     
     # Tokenize with spaCy
     try:
         doc = nlp(text)
     except Exception as e:
-        print(f"DEBUG - spaCy tokenization failed: {str(e)}")
+        logger.warning("spaCy tokenization failed: %s", e)
         # Fallback to basic preprocessing
         words = text.split()
-        minimal_stopwords = {
-            'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
-            'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after', 'above',
-            'below', 'between', 'among', 'this', 'that', 'these', 'those', 'is', 'was', 'are',
-            'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-            'would', 'could', 'should', 'may', 'might', 'must', 'can', 'shall'
-        }
-        filtered_words = [word for word in words if word not in minimal_stopwords and len(word) > 2]
+        filtered_words = [word for word in words if word not in MINIMAL_STOPWORDS and len(word) > 2]
         return ' '.join(filtered_words)
     
     # Extract noun phrases (1-3 words) as key terms
@@ -94,61 +82,51 @@ def preprocess_text(text):
     for chunk in doc.noun_chunks:
         term = chunk.text.lower().strip()
         # Limit to 1-3 words, exclude proper nouns
-        if 1 <= len(term.split()) <= 3 and all(token.ent_type_ not in ['PERSON', 'ORG', 'GPE'] for token in chunk):
+        if 1 <= len(term.split()) <= 3 and all(token.ent_type_ not in EXCLUDED_ENTITY_LABELS for token in chunk):
             # Exclude terms longer than 30 characters to prevent sentence-like phrases
             if len(term.replace(' ', '')) <= 30:
                 key_terms.add(term)
     
     # Log rejected terms for debugging
-    rejected_terms = [chunk.text.lower().strip() for chunk in doc.noun_chunks if chunk.text.lower().strip() not in key_terms]
-    print(f"DEBUG - Rejected terms: {rejected_terms[:10]}...")
+    if logger.isEnabledFor(logging.DEBUG):
+        rejected_terms = [chunk.text.lower().strip() for chunk in doc.noun_chunks if chunk.text.lower().strip() not in key_terms]
+        logger.debug("Rejected terms: %s...", rejected_terms[:10])
     
-    # Tokenize while preserving key terms
+    # Tokenize while preserving key terms, preferring the longest phrase at each position
+    trie = KeyTermTrie(key_terms)
+    words = [token.text for token in doc]
     filtered_tokens = []
     i = 0
     while i < len(doc):
-        found_term = False
-        for term in key_terms:
-            term_words = term.split()
-            term_length = len(term_words)
-            if i + term_length <= len(doc):
-                if ' '.join([doc[i + j].text for j in range(term_length)]) == term:
-                    filtered_tokens.append(term)
-                    i += term_length
-                    found_term = True
-                    break
-        if not found_term:
+        term, term_length = trie.longest_match(words, i)
+        if term is not None:
+            filtered_tokens.append(term)
+            i += term_length
+        else:
             token = doc[i]
-            if token.ent_type_ not in ['PERSON', 'ORG', 'GPE'] and 2 <= len(token.text) <= 20:
+            if token.ent_type_ not in EXCLUDED_ENTITY_LABELS and 2 <= len(token.text) <= 20:
                 filtered_tokens.append(token.text)
             i += 1
     
-    # Minimal stopword removal
-    minimal_stopwords = {
-        'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
-        'from', 'up', 'about', 'into', 'through', 'during', 'before', 'after', 'above',
-        'below', 'between', 'among', 'this', 'that', 'these', 'those', 'is', 'was', 'are',
-        'were', 'be', 'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will',
-        'would', 'could', 'should', 'may', 'might', 'must', 'can', 'shall'
-    }
-    
-    # Filter stopwords but keep key terms
-    filtered_words = [word for word in filtered_tokens if word not in minimal_stopwords or word in key_terms]
+    # Minimal stopword removal, keeping key terms
+    filtered_words = [word for word in filtered_tokens if word not in MINIMAL_STOPWORDS or word in key_terms]
     
     result = ' '.join(filtered_words)
-    print(f"DEBUG - Preprocessed text preview: {result[:200]}...")
-    print(f"DEBUG - Extracted key terms: {list(key_terms)[:10]}...")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Preprocessed text preview: %s...", result[:200])
+        logger.debug("Extracted key terms: %s...", list(key_terms)[:10])
     return result
 
-def analyze_resume_with_tfidf(resume_text):
+def analyze_resume_with_tfidf(resume_text, analysis=None):
     try:
-        print(f"DEBUG - Original resume text length: {len(resume_text)}")
+        logger.debug("Original resume text length: %d", len(resume_text))
 
-        # Initialize our custom TF-IDF analyzer
-        tfidf_analyzer = SimpleTFIDF()
+        # Reuse a precomputed DocumentAnalysis when the caller already has one
+        if analysis is None:
+            analysis = get_analyzer().analyze(resume_text)
 
         # Get top keywords using our custom implementation
-        keyword_scores = tfidf_analyzer.get_top_keywords(resume_text, top_n=20)
+        keyword_scores = analysis.top_keywords(top_n=20)
 
         # Filter keywords to exclude irrelevant terms
         filtered_keywords = {
@@ -157,8 +135,9 @@ def analyze_resume_with_tfidf(resume_text):
             and len(term.replace(' ', '')) <= 30  # Prevent long concatenated terms
         }
 
-        print(f"DEBUG - Resume features found: {len(filtered_keywords)}")
-        print(f"DEBUG - Top resume features: {list(filtered_keywords.keys())[:10]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Resume features found: %d", len(filtered_keywords))
+            logger.debug("Top resume features: %s", list(filtered_keywords)[:10])
 
         # Prepare top keywords for display
         top_keywords = []
@@ -175,12 +154,10 @@ def analyze_resume_with_tfidf(resume_text):
         llm_analysis = None
         if client and os.getenv("GROQ_API_KEY"):
             try:
-                llm_analysis = get_resume_strengths_weaknesses(resume_text, filtered_keywords)
-                print(f"DEBUG - LLM analysis result: {llm_analysis}")
+                llm_analysis = get_resume_strengths_weaknesses(resume_text, filtered_keywords, document_tfidf=analysis.tfidf)
+                logger.debug("LLM analysis result: %s", llm_analysis)
             except Exception as e:
-                print(f"DEBUG - LLM strengths/weaknesses error: {str(e)}")
-                import traceback
-                print(f"DEBUG - Full traceback: {traceback.format_exc()}")
+                logger.exception("LLM strengths/weaknesses error: %s", e)
                 llm_analysis = {"error": f"LLM analysis failed: {str(e)}"}
 
         return {
@@ -188,14 +165,18 @@ def analyze_resume_with_tfidf(resume_text):
             "llm_strengths_weaknesses": llm_analysis
         }
     except Exception as e:
-        print(f"DEBUG - Resume analysis error: {str(e)}")
+        logger.error("Resume analysis error: %s", e)
         return {
             "top_keywords": [],  # Return empty list to avoid frontend error
             "llm_strengths_weaknesses": {"error": f"TF-IDF analysis failed: {str(e)}"}
         }
 
-def get_resume_strengths_weaknesses(resume_text, tfidf_scores):
-    """Use Groq LLM to identify resume strengths and weaknesses."""
+def get_resume_strengths_weaknesses(resume_text, tfidf_scores, document_tfidf=None):
+    """Use Groq LLM to identify resume strengths and weaknesses.
+
+    ``document_tfidf`` is the resume's full TF-IDF map; it ranks sentences when
+    the resume has to be shortened to the model's token budget.
+    """
     top_terms = ", ".join([f"{term}: {score:.4f}" for term, score in sorted(tfidf_scores.items(), key=lambda x: x[1], reverse=True)[:10]])
     system_prompt = (
         "You are a career advisor specializing in professional roles. Analyze the provided resume text, focusing on domain-specific skills, tools, and experiences relevant to the job domain (e.g., technical skills for tech roles, financial skills for finance roles). "
@@ -204,48 +185,28 @@ def get_resume_strengths_weaknesses(resume_text, tfidf_scores):
         "Return the response in JSON format: {\"strengths\": [\"bullet1\", \"bullet2\", ...], \"weaknesses\": [\"bullet1\", \"bullet2\", ...]}."
     )
 
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
+    response_content = cached_completion(
+        client,
+        "llama-3.1-8b-instant",
+        [
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": resume_text[:4000]}  # Truncate for token limits
+            {"role": "user", "content": budget_text(resume_text, token_budget("llama-3.1-8b-instant"), document_tfidf or tfidf_scores)}
         ],
         temperature=0.7,
         max_tokens=500
     )
+    return parse_llm_json(response_content, "strengths_weaknesses")
 
-    response_content = response.choices[0].message.content
-    try:
-        # Remove markdown code blocks if present
-        if response_content.startswith("```json"):
-            response_content = response_content.replace("```json", "").replace("```", "").strip()
-        elif response_content.startswith("```"):
-            response_content = response_content.replace("```", "").strip()
-
-        # Extract JSON from the response
-        start_idx = response_content.find('{')
-        end_idx = response_content.rfind('}')
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            json_content = response_content[start_idx:end_idx+1]
-            return json.loads(json_content)
-
-        return json.loads(response_content)
-    except json.JSONDecodeError:
-        return {
-            "strengths": ["Unable to parse structured response"],
-            "weaknesses": ["Please check the AI model response format"],
-            "raw_response": response_content
-        }
-
-def analyze_job_description_with_tfidf(job_description_text):
+def analyze_job_description_with_tfidf(job_description_text, analysis=None):
     try:
-        print(f"DEBUG - Original job desc text length: {len(job_description_text)}")
+        logger.debug("Original job desc text length: %d", len(job_description_text))
 
-        # Initialize our custom TF-IDF analyzer
-        tfidf_analyzer = SimpleTFIDF()
+        # Reuse a precomputed DocumentAnalysis when the caller already has one
+        if analysis is None:
+            analysis = get_analyzer().analyze(job_description_text)
 
         # Get top keywords using our custom implementation
-        keyword_scores = tfidf_analyzer.get_top_keywords(job_description_text, top_n=20)
+        keyword_scores = analysis.top_keywords(top_n=20)
 
         # Filter keywords to exclude irrelevant terms
         filtered_keywords = {
@@ -254,8 +215,9 @@ def analyze_job_description_with_tfidf(job_description_text):
             and len(term.replace(' ', '')) <= 30  # Prevent long concatenated terms
         }
 
-        print(f"DEBUG - Job desc features found: {len(filtered_keywords)}")
-        print(f"DEBUG - Top job desc features: {list(filtered_keywords.keys())[:10]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Job desc features found: %d", len(filtered_keywords))
+            logger.debug("Top job desc features: %s", list(filtered_keywords)[:10])
 
         # Prepare top keywords for display
         top_keywords = []
@@ -272,18 +234,18 @@ def analyze_job_description_with_tfidf(job_description_text):
             "top_keywords": top_keywords
         }
     except Exception as e:
-        print(f"DEBUG - Job desc analysis error: {str(e)}")
+        logger.error("Job desc analysis error: %s", e)
         return {
             "top_keywords": [],  # Return empty list to avoid frontend error
             "error": f"TF-IDF analysis failed: {str(e)}"
         }
 
-def calculate_resume_job_similarity(resume_text, job_description_text):
+def calculate_resume_job_similarity(resume_text, job_description_text, resume_analysis=None, job_analysis=None):
     try:
-        print("DEBUG - Starting similarity calculation...")
+        logger.debug("Starting similarity calculation...")
 
         if not resume_text.strip() or not job_description_text.strip():
-            print("DEBUG - One or both texts are empty")
+            logger.debug("One or both texts are empty")
             return {
                 "similarity_score": 0.0,
                 "match_quality": "Poor Match",
@@ -292,38 +254,18 @@ def calculate_resume_job_similarity(resume_text, job_description_text):
             }
 
         # Initialize our custom TF-IDF analyzer
-        tfidf_analyzer = SimpleTFIDF()
-
-        # Compare documents using our custom implementation
-        similarity_result = tfidf_analyzer.compare_documents(resume_text, job_description_text)
-
-        similarity_score = similarity_result["similarity_score"]
-        common_keywords = similarity_result["common_keywords"]
+        tfidf_analyzer = get_analyzer()
 
-        print(f"DEBUG - Raw similarity score: {similarity_score}")
-        print(f"DEBUG - Common terms found: {len(common_keywords)}")
+        # Compare documents, reusing any precomputed analyses
+        if resume_analysis is None:
+            resume_analysis = tfidf_analyzer.analyze(resume_text)
+        if job_analysis is None:
+            job_analysis = tfidf_analyzer.analyze(job_description_text)
+        similarity_result = tfidf_analyzer.compare_analyses(resume_analysis, job_analysis)
+        return _similarity_analysis(similarity_result)
 
-        common_terms = common_keywords[:15]  # Top 15 common keywords
-        
-        # Match quality
-        if similarity_score >= 0.3:
-            match_quality = "Excellent Match"
-        elif similarity_score >= 0.2:
-            match_quality = "Good Match"
-        elif similarity_score >= 0.1:
-            match_quality = "Fair Match"
-        else:
-            match_quality = "Poor Match"
-        
-        return {
-            "similarity_score": round(float(similarity_score), 4),
-            "match_quality": match_quality,
-            "common_keywords": common_terms,
-            "total_features": len(common_terms)
-        }
-        
     except Exception as e:
-        print(f"DEBUG - Similarity calculation error: {str(e)}")
+        logger.error("Similarity calculation error: %s", e)
         return {
             "similarity_score": 0.0,
             "match_quality": "Poor Match",
@@ -332,21 +274,59 @@ def calculate_resume_job_similarity(resume_text, job_description_text):
             "error": f"Similarity calculation failed: {str(e)}"
         }
 
+def _similarity_analysis(similarity_result):
+    """Similarity analysis response (score, match quality, common keywords) from a compare result"""
+    similarity_score = similarity_result["similarity_score"]
+    common_keywords = similarity_result["common_keywords"]
+
+    logger.debug("Raw similarity score: %s", similarity_score)
+    logger.debug("Common terms found: %d", len(common_keywords))
+
+    common_terms = common_keywords[:15]  # Top 15 common keywords
+
+    # Match quality
+    if similarity_score >= 0.3:
+        match_quality = "Excellent Match"
+    elif similarity_score >= 0.2:
+        match_quality = "Good Match"
+    elif similarity_score >= 0.1:
+        match_quality = "Fair Match"
+    else:
+        match_quality = "Poor Match"
+
+    return {
+        "similarity_score": round(float(similarity_score), 4),
+        "match_quality": match_quality,
+        "common_keywords": common_terms,
+        "total_features": len(common_terms)
+    }
+
 def comprehensive_resume_job_analysis(resume_text, job_description_text):
     try:
-        print("DEBUG - Starting comprehensive analysis...")
-        resume_analysis = analyze_resume_with_tfidf(resume_text)
-        job_desc_analysis = analyze_job_description_with_tfidf(job_description_text)
-        similarity_analysis = calculate_resume_job_similarity(resume_text, job_description_text)
+        logger.debug("Starting comprehensive analysis...")
+
+        # Tokenize and score each document once, then derive every section from it
+        tfidf_analyzer = get_analyzer()
+        resume_doc = tfidf_analyzer.analyze(resume_text)
+        job_desc_doc = tfidf_analyzer.analyze(job_description_text)
+
+        resume_analysis = analyze_resume_with_tfidf(resume_text, analysis=resume_doc)
+        job_desc_analysis = analyze_job_description_with_tfidf(job_description_text, analysis=job_desc_doc)
+        similarity_analysis = calculate_resume_job_similarity(
+            resume_text, job_description_text, resume_analysis=resume_doc, job_analysis=job_desc_doc
+        )
         
         # LLM analysis for job fit
         llm_fit = None
         if client and os.getenv("GROQ_API_KEY"):
             try:
-                llm_fit = get_resume_job_fit(resume_text, job_description_text, similarity_analysis)
-                print(f"DEBUG - LLM fit assessment result: {llm_fit}")
+                llm_fit = get_resume_job_fit(
+                    resume_text, job_description_text, similarity_analysis,
+                    resume_tfidf=resume_doc.tfidf, job_tfidf=job_desc_doc.tfidf
+                )
+                logger.debug("LLM fit assessment result: %s", llm_fit)
             except Exception as e:
-                print(f"DEBUG - LLM fit assessment error: {str(e)}")
+                logger.error("LLM fit assessment error: %s", e)
                 llm_fit = {"error": f"LLM fit assessment failed: {str(e)}"}
         
         return {
@@ -357,7 +337,7 @@ def comprehensive_resume_job_analysis(resume_text, job_description_text):
         }
         
     except Exception as e:
-        print(f"DEBUG - Comprehensive analysis error: {str(e)}")
+        logger.error("Comprehensive analysis error: %s", e)
         return {
             "resume_analysis": {"top_keywords": [], "error": f"Analysis failed: {str(e)}"},
             "job_description_analysis": {"top_keywords": [], "error": f"Analysis failed: {str(e)}"},
@@ -370,8 +350,62 @@ def comprehensive_resume_job_analysis(resume_text, job_description_text):
             "llm_fit_assessment": {"error": f"Comprehensive analysis failed: {str(e)}"}
         }
 
-def get_resume_job_fit(resume_text, job_description_text, similarity_analysis):
-    """Use Groq LLM to assess resume fit for the job description."""
+def rank_resumes_against_job(resume_texts, job_description_text, n_process=None, batch_size=None):
+    """
+    Score many resumes against one job description and rank them by similarity.
+
+    The job description is analyzed once, the resumes are streamed through
+    nlp.pipe and all of them are scored against the job in one sparse
+    matrix-vector product (compare_many); each result matches the
+    single-resume path.
+
+    Args:
+        resume_texts (list): Extracted resume texts
+        job_description_text (str): Job description text
+        n_process (int, optional): nlp.pipe worker processes (default BATCH_N_PROCESS)
+        batch_size (int, optional): nlp.pipe batch size (default BATCH_SIZE)
+
+    Returns:
+        dict: Job description keywords and resumes ordered best match first
+    """
+    logger.debug("Ranking %d resumes against job description...", len(resume_texts))
+    tfidf_analyzer = get_analyzer()
+    job_desc_doc = tfidf_analyzer.analyze(job_description_text)
+    resume_docs = tfidf_analyzer.analyze_many(
+        resume_texts,
+        n_process=n_process or BATCH_N_PROCESS,
+        batch_size=batch_size or BATCH_SIZE
+    )
+
+    if job_description_text.strip():
+        similarities = tfidf_analyzer.compare_many(resume_docs, job_desc_doc)
+    else:
+        similarities = [None] * len(resume_docs)
+
+    ranked = []
+    for index, (resume_text, resume_doc, similarity) in enumerate(zip(resume_texts, resume_docs, similarities)):
+        if similarity is None or not resume_text.strip():
+            similarity_analysis = calculate_resume_job_similarity(resume_text, job_description_text)
+        else:
+            similarity_analysis = _similarity_analysis(similarity)
+        ranked.append({
+            "index": index,
+            "similarity_analysis": similarity_analysis,
+            "top_keywords": analyze_resume_with_tfidf(resume_text, analysis=resume_doc)["top_keywords"]
+        })
+    ranked.sort(key=lambda x: x["similarity_analysis"]["similarity_score"], reverse=True)
+
+    return {
+        "job_description_analysis": analyze_job_description_with_tfidf(job_description_text, analysis=job_desc_doc),
+        "ranked_resumes": ranked
+    }
+
+def get_resume_job_fit(resume_text, job_description_text, similarity_analysis, resume_tfidf=None, job_tfidf=None):
+    """Use Groq LLM to assess resume fit for the job description.
+
+    Both documents share the model's token budget; their TF-IDF maps, when
+    given, decide which sentences are kept.
+    """
     sim_score = similarity_analysis.get("similarity_score", 0)
     common_terms_str = ", ".join([f"{kw['term']}: {kw['combined_importance']:.4f}" for kw in similarity_analysis.get("common_keywords", [])[:5]])
     system_prompt = (
@@ -382,36 +416,17 @@ def get_resume_job_fit(resume_text, job_description_text, similarity_analysis):
         "{\"fit_percentage\": int, \"reasons\": [\"bullet1\", \"bullet2\", ...], \"suggestions\": [\"bullet1\", \"bullet2\", ...]}."
     )
 
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
+    resume_text, job_description_text = budget_documents(
+        [(resume_text, resume_tfidf), (job_description_text, job_tfidf)], token_budget("llama-3.1-8b-instant")
+    )
+    response_content = cached_completion(
+        client,
+        "llama-3.1-8b-instant",
+        [
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Resume: {resume_text[:2000]}\n\nJob Description: {job_description_text[:2000]}"}
+            {"role": "user", "content": f"Resume: {resume_text}\n\nJob Description: {job_description_text}"}
         ],
         temperature=0.7,
         max_tokens=600
     )
-
-    response_content = response.choices[0].message.content
-    try:
-        # Remove markdown code blocks if present
-        if response_content.startswith("```json"):
-            response_content = response_content.replace("```json", "").replace("```", "").strip()
-        elif response_content.startswith("```"):
-            response_content = response_content.replace("```", "").strip()
-
-        # Extract JSON from the response
-        start_idx = response_content.find('{')
-        end_idx = response_content.rfind('}')
-        if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-            json_content = response_content[start_idx:end_idx+1]
-            return json.loads(json_content)
-
-        return json.loads(response_content)
-    except json.JSONDecodeError:
-        return {
-            "fit_percentage": 0,
-            "reasons": ["Unable to parse structured response"],
-            "suggestions": ["Please check the AI model response format"],
-            "raw_response": response_content
-        }
\ No newline at end of file
+    return parse_llm_json(response_content, "job_fit")
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Startup warmup: load models and run a synthetic document before serving.
+
+warm_process() loads everything the analyzers share in the current process -
+the spaCy model and its profiles, the stopword set and the IDF table - and
+pushes a small resume/job description pair through the same TF-IDF path a
+request takes. It runs in every CPU worker process as the pool's initializer,
+and run_warmup() drives it from the FastAPI lifespan hook so /health can
+report readiness once the workers are warm. The workers' model stats are kept
+for /health too, since with CPU_WORKERS > 0 the model is only loaded there.
+"""
+import asyncio
+import logging
+import os
+import time
+from executors import run_cpu, CPU_WORKERS
+from nlp_models import get_nlp, get_stopwords, model_stats, PROFILES
+
+logger = logging.getLogger(__name__)
+
+WARMUP_RESUME = (
+    "Software engineer with five years of experience building Python web services. "
+    "Designed REST APIs with FastAPI, led a team of three developers, and improved "
+    "data pipeline performance using SQL and machine learning models."
+)
+WARMUP_JOB_DESCRIPTION = (
+    "We are hiring a backend developer skilled in Python, SQL and API design. "
+    "Experience with machine learning and team leadership is a plus."
+)
+
+_warm = False
+_state = {"status": "pending", "seconds": None, "error": None}
+_worker_models = []
+
+
+def warm_process():
+    """
+    Load shared models in this process and analyze a synthetic document once.
+
+    Safe to call repeatedly; only the first call does the work.
+
+    Returns:
+        float: Seconds spent warming up (0.0 if the process was already warm)
+    """
+    global _warm
+    if _warm:
+        return 0.0
+    start = time.perf_counter()
+    from simple_tfidf import get_analyzer
+
+    for profile in PROFILES:
+        if get_nlp(profile) is None:
+            raise RuntimeError("spaCy model failed to load")
+    get_stopwords()
+    analyzer = get_analyzer()
+    resume = analyzer.analyze(WARMUP_RESUME)
+    job = analyzer.analyze(WARMUP_JOB_DESCRIPTION)
+    analyzer.compare_analyses(resume, job)
+    _warm = True
+    return time.perf_counter() - start
+
+
+def warm_worker():
+    """Warm the process this runs in and return its model stats, tagged with its pid"""
+    warm_process()
+    return {"pid": os.getpid(), **model_stats()}
+
+
+async def run_warmup():
+    """
+    Warm the processes that will serve analysis requests.
+
+    One job per CPU worker makes the pool start every worker (each runs
+    warm_process as its initializer); with CPU_WORKERS=0 the job warms this
+    process instead.
+    """
+    _state["status"] = "warming"
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(run_cpu(warm_worker) for _ in range(max(1, CPU_WORKERS))))
+        _worker_models[:] = {stats["pid"]: stats for stats in results}.values()
+        _state["status"] = "ready"
+        logger.info("✅ Warmup completed in %.2fs", time.perf_counter() - start)
+    except Exception as e:
+        _state["status"] = "failed"
+        _state["error"] = str(e)
+        logger.error("❌ Warmup failed: %s", e)
+    finally:
+        _state["seconds"] = round(time.perf_counter() - start, 3)
+
+
+def warmup_state():
+    """Warmup status (pending, warming, ready, failed), duration and error"""
+    return dict(_state)
+
+
+def worker_model_stats():
+    """Model stats reported by each process warmed by run_warmup (one per pid)"""
+    return [dict(stats) for stats in _worker_models]
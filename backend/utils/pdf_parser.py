@@ -1,30 +1,139 @@
-
+import io
+import logging
+import os
+import tempfile
 import pdfplumber
-from pdf2image import convert_from_path
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from pdf2image import convert_from_path, pdfinfo_from_path, pdfinfo_from_bytes
 from PIL import Image
 import pytesseract
 import pathlib
 import re
 from bs4 import BeautifulSoup
 
-def extract_with_pdfplumber(file_path):
+# Pages OCR'd concurrently. pdftoppm and tesseract run as child processes, so
+# threads are enough to keep several cores busy.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Debug mode: also write each extracted text to a .txt file
+SAVE_EXTRACTED_TEXT = os.getenv("SAVE_EXTRACTED_TEXT", "").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+def _is_pdf_bytes(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+def extract_pages_with_pdfplumber(source):
+    """
+    Extract the text of each PDF page using pdfplumber.
+
+    Args:
+        source (str | bytes): Path to the PDF, or its raw bytes (read from memory)
+
+    Returns:
+        list: Text per page ('' for pages without a text layer)
+    """
+    with pdfplumber.open(io.BytesIO(source) if _is_pdf_bytes(source) else source) as pdf:
+        return [page.extract_text() or '' for page in pdf.pages]
+
+def extract_with_pdfplumber(source):
     """
     Extract text from PDF using pdfplumber.
     """
-    text = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() or ''
-    return text
+    return ''.join(extract_pages_with_pdfplumber(source))
 
-def extract_with_ocr(file_path):
+def ocr_page(file_path, page_number):
+    """
+    Rasterize and OCR a single page (1-based), so only one page image is in memory.
+    """
+    images = convert_from_path(file_path, first_page=page_number, last_page=page_number)
+    return ''.join(pytesseract.image_to_string(img) for img in images)
+
+def _try_ocr_page(file_path, page_number):
+    """ocr_page, returning (text, None) or ('', error) so one bad page doesn't sink the rest"""
+    try:
+        return ocr_page(file_path, page_number), None
+    except Exception as e:
+        logger.warning("⚠️ OCR failed on page %d: %s", page_number, e)
+        return '', e
+
+def ocr_pages(source, page_numbers):
+    """
+    OCR the given pages (1-based) in parallel, at most OCR_WORKERS pages at a time.
+
+    pdftoppm needs a file, so in-memory PDFs are spooled to one temporary
+    file for the duration of the OCR pass. A page whose OCR fails is logged
+    and comes back as ''; only when every page fails is the first error raised.
+
+    Returns:
+        list: OCR text per requested page, in the same order
+    """
+    page_numbers = list(page_numbers)
+    if _is_pdf_bytes(source):
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+            f.write(source)
+            f.flush()
+            return ocr_pages(f.name, page_numbers)
+    if OCR_WORKERS <= 1 or len(page_numbers) <= 1:
+        results = [_try_ocr_page(source, page_number) for page_number in page_numbers]
+    else:
+        with ThreadPoolExecutor(max_workers=min(OCR_WORKERS, len(page_numbers))) as pool:
+            results = list(pool.map(_try_ocr_page, repeat(source), page_numbers))
+    errors = [error for _, error in results if error is not None]
+    if errors and len(errors) == len(results):
+        raise errors[0]
+    return [text for text, _ in results]
+
+def extract_with_ocr(source):
     """
     Extract text from PDF using OCR if pdfplumber fails.
     """
-    images = convert_from_path(file_path)
-    text = ""
-    for img in images:
-        text += pytesseract.image_to_string(img)
+    if _is_pdf_bytes(source):
+        page_count = pdfinfo_from_bytes(bytes(source))["Pages"]
+    else:
+        page_count = pdfinfo_from_path(source)["Pages"]
+    return ''.join(ocr_pages(source, range(1, page_count + 1)))
+
+# Precompiled patterns for clean_extracted_text
+_MARKUP_RE = re.compile(r'<[A-Za-z/!?]|&(?:#[0-9]+|#[xX][0-9A-Fa-f]+|[A-Za-z][A-Za-z0-9]*)')
+_DISALLOWED_CHARS_RE = re.compile(r'[^\w\s.,-]+')  # Bullets, symbols; keeps alphanumerics, spaces, basic punctuation
+_PLACEHOLDER_TAIL_RE = re.compile(r'xx\b')  # Literal anchor for standalone 'xx' and year placeholders like 20xx
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+def _remove_placeholders(text):
+    r"""
+    Remove standalone 'xx' and 'NNxx' year placeholders (same as re.sub(r'\b(\d{2})?xx\b', '', text)),
+    scanning only at literal 'xx' hits instead of testing a word boundary at every position.
+    """
+    parts = []
+    last = 0
+    for match in _PLACEHOLDER_TAIL_RE.finditer(text):
+        start = match.start()
+        if start == 0 or not _is_word_char(text[start - 1]):
+            cut = start
+        elif start >= 2 and text[start - 2:start].isdecimal() and (start == 2 or not _is_word_char(text[start - 3])):
+            cut = start - 2
+        else:
+            continue
+        parts.append(text[last:cut])
+        last = match.end()
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return ''.join(parts)
+
+def _reference_clean(text):
+    """The original cleaner (BeautifulSoup on every input, then one re.sub per rule), kept as the golden reference"""
+    text = BeautifulSoup(text, "html.parser").get_text()
+    text = re.sub(r'[•➢]', '', text)
+    text = re.sub(r'[^\w\s.,-]', '', text)
+    text = re.sub(r'\n+', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'\bxx\b', '', text)
+    text = re.sub(r'\b\d{2}xx\b', '', text)
     return text
 
 def clean_extracted_text(text):
@@ -37,35 +146,95 @@ def clean_extracted_text(text):
     Returns:
         str: Cleaned text
     """
-    # Remove HTML tags if any
-    text = BeautifulSoup(text, "html.parser").get_text()
-    
-    # Remove bullet points and special characters
-    text = re.sub(r'[•➢]', '', text)  # Remove common bullet points
-    text = re.sub(r'[^\w\s.,-]', '', text)  # Keep alphanumeric, spaces, and basic punctuation
-    text = re.sub(r'\n+', ' ', text)  # Replace newlines with spaces
-    text = re.sub(r'\s+', ' ', text).strip()  # Normalize whitespace
-    text = re.sub(r'\bxx\b', '', text)     # Remove standalone 'xx'
-    text = re.sub(r'\b\d{2}xx\b', '', text)  # Remove year placeholders like 20xx, 19xx
+    # Remove HTML tags and entities, only when the text looks like markup
+    if _MARKUP_RE.search(text):
+        text = BeautifulSoup(text, "html.parser").get_text()
 
-    
-    return text
+    text = _DISALLOWED_CHARS_RE.sub('', text)
+    text = ' '.join(text.split())  # Collapse newlines and whitespace runs
+    return _remove_placeholders(text)
 
-def extract_text_from_any_pdf(file_path):
+def extract_text_from_any_pdf(source):
     """
     Extract and clean text from any PDF, using pdfplumber or OCR as fallback.
+
+    OCR failures are not fatal while pdfplumber found text on other pages;
+    the error is raised only when no page produced any text.
     
     Args:
-        file_path (str): Path to the PDF file
+        source (str | bytes): Path to the PDF file, or its raw bytes
     
     Returns:
         str: Cleaned extracted text
     """
-    text = extract_with_pdfplumber(file_path)
-    if not text.strip():
-        print("No text found with pdfplumber. Switching to OCR...")
-        text = extract_with_ocr(file_path)
-    return clean_extracted_text(text)
+    pages = extract_pages_with_pdfplumber(source)
+
+    # OCR only the pages without a text layer (scanned pages in mixed PDFs)
+    missing = [i for i, page in enumerate(pages) if not page.strip()]
+    if missing:
+        logger.info("No text found with pdfplumber on %d of %d pages. Switching to OCR for those pages...", len(missing), len(pages))
+        try:
+            for i, page_text in zip(missing, ocr_pages(source, [i + 1 for i in missing])):
+                pages[i] = page_text
+        except Exception as e:
+            if len(missing) == len(pages):
+                raise
+            logger.warning("⚠️ OCR unavailable, keeping the text of the other %d pages: %s", len(pages) - len(missing), e)
+    return clean_extracted_text(''.join(pages))
+
+def iter_pdf_pages(source, max_pages=None, max_chars=None):
+    """
+    Stream cleaned text page by page, OCR'ing pages that have no text layer.
+
+    Pages are extracted lazily, so a consumer that stops iterating (or hits
+    max_pages / max_chars) never pays for the remaining pages. A page whose
+    OCR fails is logged and skipped.
+
+    Args:
+        source (str | bytes): Path to the PDF, or its raw bytes
+        max_pages (int, optional): Stop after this many pages
+        max_chars (int, optional): Stop once this many characters have been yielded;
+            the last page is truncated to fit
+
+    Yields:
+        str: Cleaned text of each non-empty page
+    """
+    emitted = 0
+    ocr_source = source
+    spooled = None
+    try:
+        with pdfplumber.open(io.BytesIO(source) if _is_pdf_bytes(source) else source) as pdf:
+            for number, page in enumerate(pdf.pages, start=1):
+                if max_pages is not None and number > max_pages:
+                    break
+                text = page.extract_text() or ''
+                if not text.strip():
+                    # Spool in-memory PDFs to disk once, and only if a page needs OCR
+                    if _is_pdf_bytes(source) and spooled is None:
+                        spooled = tempfile.NamedTemporaryFile(suffix=".pdf")
+                        spooled.write(source)
+                        spooled.flush()
+                        ocr_source = spooled.name
+                    text, _ = _try_ocr_page(ocr_source, number)
+                text = clean_extracted_text(text)
+                if not text:
+                    continue
+                if max_chars is not None:
+                    text = text[:max_chars - emitted]
+                emitted += len(text)
+                yield text
+                if max_chars is not None and emitted >= max_chars:
+                    break
+    finally:
+        if spooled is not None:
+            spooled.close()
+
+def extract_text_prefix(source, max_chars):
+    """
+    First max_chars characters of a PDF's cleaned text, extracting (and
+    OCR'ing) only the pages needed to fill them. Pages are joined by a space.
+    """
+    return ' '.join(iter_pdf_pages(source, max_chars=max_chars))[:max_chars]
 
 def save_text_to_file(text, output_path):
     """
@@ -78,27 +247,55 @@ def save_text_to_file(text, output_path):
     try:
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(text)
-        print(f"✅ Text successfully saved to {output_path}")
+        logger.info("✅ Text successfully saved to %s", output_path)
     except Exception as e:
-        print(f"⚠️ Error saving file: {e}")
+        logger.warning("⚠️ Error saving file: %s", e)
 
-def textextractionfunction(file_path, output_path):
+def textextractionfunction(source, output_path=None):
     """
-    Main function to extract and save cleaned text from a PDF.
+    Main function to extract cleaned text from a PDF, optionally saving it.
     
     Args:
-        file_path (str): Path to the input PDF
-        output_path (str): Path to save the output text file
+        source (str | bytes): Path to the input PDF, or its raw bytes
+        output_path (str, optional): Path to save the output text file (debugging aid)
     
     Returns:
         str: Cleaned extracted text
     """
-    text = extract_text_from_any_pdf(file_path)
-    save_text_to_file(text, output_path)
+    text = extract_text_from_any_pdf(source)
+    if output_path is not None:
+        save_text_to_file(text, output_path)
     return text
 
+def _benchmark_clean(number):
+    """Time clean_extracted_text against _reference_clean on the bundled sample PDFs"""
+    import timeit
+
+    here = pathlib.Path(__file__).resolve().parent
+    paths = sorted(here.glob("*.pdf")) + sorted(here.parent.joinpath("app").glob("*.pdf"))
+    print(f"{'document':32} {'chars':>7} {'old ms':>8} {'new ms':>8} {'speedup':>8} {'same':>5}")
+    for path in paths:
+        text = ''.join(extract_pages_with_pdfplumber(str(path)))
+        old = timeit.timeit(lambda: _reference_clean(text), number=number) / number
+        new = timeit.timeit(lambda: clean_extracted_text(text), number=number) / number
+        same = clean_extracted_text(text) == _reference_clean(text)
+        print(f"{path.name[:32]:32} {len(text):>7} {old * 1000:>8.2f} {new * 1000:>8.2f} {old / new:>7.1f}x {str(same):>5}")
+
 if __name__ == "__main__":
-    outpath = pathlib.Path(__file__).resolve().parent
-    filepath = outpath / "sample.pdf"  # Adjust as needed
-    outputpath = outpath / "output.txt"
-    textextractionfunction(filepath, outputpath)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract text from a PDF, or benchmark clean_extracted_text")
+    parser.add_argument("pdf", nargs="?", help="PDF to extract (default: sample.pdf next to this file)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Time clean_extracted_text against the original cleaner on the bundled sample PDFs")
+    parser.add_argument("--number", type=int, default=20, help="Runs timed per document when benchmarking")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.benchmark:
+        _benchmark_clean(args.number)
+    else:
+        outpath = pathlib.Path(__file__).resolve().parent
+        filepath = pathlib.Path(args.pdf) if args.pdf else outpath / "sample.pdf"  # Adjust as needed
+        outputpath = outpath / "output.txt"
+        textextractionfunction(filepath, outputpath)
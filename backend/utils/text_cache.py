@@ -0,0 +1,152 @@
+"""
+Content-addressed cache for extracted PDF text.
+
+Entries are keyed by the SHA-256 of the uploaded bytes, so re-posting the same
+PDF skips pdfplumber and OCR entirely. An in-memory LRU tier is always on; an
+on-disk tier with size-based eviction is enabled by setting PDF_CACHE_DIR.
+
+    PDF_CACHE_SIZE        entries kept in memory (0 disables the memory tier)
+    PDF_CACHE_DIR         directory for the disk tier (unset disables it)
+    PDF_CACHE_MAX_BYTES   disk tier size limit; oldest entries are evicted first
+
+The disk directory may be shared by several worker processes. The limit
+applies to the directory as a whole: after each write the directory is
+re-sized from disk rather than from this process's running total. Disk-tier calls block
+on file I/O, so async callers run get/put on the I/O pool and use
+get_memory for the in-memory fast path.
+"""
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+def content_key(data):
+    """SHA-256 hex digest of raw file bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class TextCache:
+    """Two-tier (memory LRU + optional disk) cache of extracted text."""
+
+    def __init__(self, max_entries=256, disk_dir=None, disk_max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.txt")
+
+    def _disk_entries(self):
+        """(mtime, path, size) of every disk entry"""
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".txt"):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, path, stat.st_size))
+                except OSError:
+                    pass
+        return entries
+
+    def _remember(self, key, text):
+        """Insert into the memory tier, evicting the least recently used entry"""
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_memory(self, key):
+        """Return text from the memory tier only, or None (a miss here is not counted)"""
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+            return text
+
+    def get(self, key):
+        """Return cached text for a content key, or None on a miss"""
+        text = self.get_memory(key)
+        if text is not None:
+            return text
+        with self._lock:
+            if self.disk_dir:
+                path = self._disk_path(key)
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        text = f.read()
+                    os.utime(path)  # Refresh recency for eviction
+                    self._remember(key, text)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return text
+                except OSError:
+                    pass
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        """Store extracted text under a content key"""
+        with self._lock:
+            self._remember(key, text)
+            if self.disk_dir:
+                self._write_disk(key, text)
+
+    def _write_disk(self, key, text):
+        path = self._disk_path(key)
+        data = text.encode("utf-8")
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("⚠️ Error writing text cache entry: %s", e)
+            return
+        # Size the directory afresh: other processes sharing it write too
+        entries = sorted(self._disk_entries())
+        self._disk_bytes = sum(size for _, _, size in entries)
+        if self._disk_bytes > self.disk_max_bytes:
+            for _, old_path, size in entries:
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+                try:
+                    os.remove(old_path)
+                    self._disk_bytes -= size
+                except OSError:
+                    pass
+
+    def stats(self):
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_enabled": bool(self.disk_dir),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+text_cache = TextCache(
+    max_entries=int(os.getenv("PDF_CACHE_SIZE", 256)),
+    disk_dir=os.getenv("PDF_CACHE_DIR") or None,
+    disk_max_bytes=int(os.getenv("PDF_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+)
@@ -0,0 +1,96 @@
+"""
+Gunicorn configuration for production serving (SERVER_MODE=gunicorn).
+
+The app is imported once in the master (preload_app) and the spaCy model,
+stopwords and IDF table are loaded there in when_ready, before any worker is
+forked. Workers inherit those pages copy-on-write instead of each loading
+its own copy; gc.freeze() keeps the garbage collector from touching (and so
+copying) them later. Each worker runs its CPU stages in-process
+(CPU_WORKERS=0) so requests use the shared model rather than spawning a
+private process pool.
+
+    WEB_CONCURRENCY      worker count (default: derived from cores and memory)
+    WORKER_MEMORY_MB     private memory budgeted per worker on top of the shared model
+    MEMORY_RESERVE_MB    memory left for the master, page cache and OCR spikes
+    GUNICORN_TIMEOUT     worker timeout in seconds (OCR of long PDFs is slow)
+
+Start with:
+
+    gunicorn -c gunicorn.conf.py backend.app.main:app
+"""
+import gc
+import os
+
+# CPU stages run in each worker's thread pool on the forked, shared model
+os.environ.setdefault("CPU_WORKERS", "0")
+
+
+def _cpu_limit():
+    """Usable cores, honouring CPU affinity and a cgroup v2 quota"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def _memory_limit_mb():
+    """Memory available to this container/host in MB (cgroup limit, else MemAvailable)"""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value != "max" and int(value) < 1 << 60:
+                return int(value) // (1024 * 1024)
+        except (OSError, ValueError):
+            pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def default_workers():
+    """One worker per core, capped by how many fit in memory"""
+    workers = _cpu_limit()
+    memory_mb = _memory_limit_mb()
+    if memory_mb is not None:
+        per_worker = int(os.getenv("WORKER_MEMORY_MB", 250))
+        reserve = int(os.getenv("MEMORY_RESERVE_MB", 400))
+        workers = min(workers, max(1, (memory_mb - reserve) // per_worker))
+    return max(1, workers)
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 0)) or default_workers()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    """Load and warm the shared models in the master, then freeze them for copy-on-write"""
+    # Importable because preload_app already imported backend.app.main, which puts backend/app on sys.path
+    from warmup import warm_process
+
+    try:
+        seconds = warm_process()
+        server.log.info(f"Preloaded models in the master in {seconds:.2f}s")
+    except Exception as e:
+        server.log.warning(f"Model preload failed, workers will load on first use: {e}")
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Starting {workers} workers")
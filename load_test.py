@@ -0,0 +1,81 @@
+"""
+Load test: /health latency while heavy analyses run.
+
+Polls /health on its own while a number of concurrent clients keep posting a
+PDF to /match-resume-job/. If blocking work leaks onto the event loop,
+/health latency climbs with the analysis load; with it on the worker pools
+it stays flat.
+
+    python load_test.py [--url http://127.0.0.1:8000] [--pdf backend/app/resume-sample.pdf]
+                        [--concurrency 1 4 8] [--seconds 10]
+
+Start the API first (start_app.py, start.sh or uvicorn). Uploads are varied
+by a trailing comment so the extracted-text cache doesn't turn them into
+cache hits.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def poll_health(client, url, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(f"{url}/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.05)
+
+
+async def analyze_forever(client, url, pdf, stop, counter):
+    while not stop.is_set():
+        counter[0] += 1
+        body = pdf + f"\n% load-test {counter[0]}\n".encode()
+        response = await client.post(
+            f"{url}/match-resume-job/",
+            files={"file": ("resume.pdf", body, "application/pdf")},
+            data={"job_description": "Python developer with SQL, data pipelines and machine learning experience"},
+        )
+        counter[1 if response.status_code == 200 else 2] += 1
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return f"{statistics.median(ordered):>8.1f} {p95:>8.1f} {ordered[-1]:>8.1f}"
+
+
+async def run_level(url, pdf, concurrency, seconds):
+    stop = asyncio.Event()
+    latencies = []
+    counter = [0, 0, 0]  # sent, ok, failed
+    async with httpx.AsyncClient(timeout=300) as client:
+        tasks = [asyncio.create_task(poll_health(client, url, stop, latencies))]
+        tasks += [asyncio.create_task(analyze_forever(client, url, pdf, stop, counter)) for _ in range(concurrency)]
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+    return latencies, counter
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure /health latency under analysis load")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--pdf", default="backend/app/resume-sample.pdf")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[0, 1, 4, 8], help="Concurrent analysis clients")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    with open(args.pdf, "rb") as f:
+        pdf = f.read()
+
+    print(f"{'clients':>7} {'analyses':>9} {'failed':>7} {'health p50':>10} {'p95':>8} {'max ms':>8}")
+    for concurrency in args.concurrency:
+        latencies, (_, ok, failed) = await run_level(args.url, pdf, concurrency, args.seconds)
+        print(f"{concurrency:>7} {ok:>9} {failed:>7}   {summarize(latencies)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
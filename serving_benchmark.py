@@ -0,0 +1,124 @@
+"""
+Serving benchmark: throughput and memory of the gunicorn mode per worker count.
+
+For each worker count, starts ``gunicorn -c gunicorn.conf.py`` with
+WEB_CONCURRENCY set, waits for /health to report ready, drives
+/match-resume-job/ with concurrent clients (as load_test.py does) and then
+reads the memory of the master and its workers from /proc. RSS counts the
+preloaded model once per process; PSS splits shared pages between the
+processes sharing them, so its total is what the server actually costs.
+"worker PSS" is the average per worker.
+
+    python serving_benchmark.py [--workers 1 2 4 8] [--concurrency 8] [--seconds 20]
+                                [--pdf backend/app/resume-sample.pdf] [--port 8790]
+
+Linux only (/proc/<pid>/smaps_rollup). Extra environment (e.g. LOG_LEVEL=WARNING)
+is passed through to gunicorn.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from load_test import analyze_forever
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def process_tree(pid):
+    """pid and its child processes"""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    return pids
+
+
+def memory_mb(pid):
+    """(RSS, PSS) of one process in MB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values.get("Rss", 0.0), values.get("Pss", 0.0)
+
+
+async def wait_ready(url, timeout):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=5) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{url}/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+async def drive(url, pdf, concurrency, seconds):
+    """Run the analysis clients for a fixed time; returns (ok, failed)"""
+    stop = asyncio.Event()
+    counter = [0, 0, 0]  # sent, ok, failed
+    async with httpx.AsyncClient(timeout=300) as client:
+        tasks = [asyncio.create_task(analyze_forever(client, url, pdf, stop, counter)) for _ in range(concurrency)]
+        await asyncio.sleep(seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+    return counter[1], counter[2]
+
+
+async def run_level(workers, args, pdf):
+    url = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "PORT": str(args.port)}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "backend.app.main:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        await wait_ready(url, args.startup_timeout)
+        await drive(url, pdf, args.concurrency, min(2.0, args.seconds))  # Warm every worker first
+        start = time.perf_counter()
+        ok, failed = await drive(url, pdf, args.concurrency, args.seconds)
+        elapsed = time.perf_counter() - start
+        memory = [memory_mb(pid) for pid in process_tree(server.pid)]
+        worker_pss = [pss for _, pss in memory[1:]]
+        return (
+            ok / elapsed, failed, sum(rss for rss, _ in memory), sum(pss for _, pss in memory),
+            sum(worker_pss) / max(1, len(worker_pss))
+        )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure gunicorn throughput and memory per worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent analysis clients")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--pdf", default="backend/app/resume-sample.pdf")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    with open(args.pdf, "rb") as f:
+        pdf = f.read()
+
+    print(f"{'workers':>7} {'req/s':>8} {'failed':>7} {'RSS MB':>9} {'PSS MB':>9} {'worker PSS':>11}")
+    for workers in args.workers:
+        rps, failed, rss, pss, worker_pss = await run_level(workers, args, pdf)
+        print(f"{workers:>7} {rps:>8.2f} {failed:>7} {rss:>9.1f} {pss:>9.1f} {worker_pss:>11.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -41,5 +41,11 @@ except LookupError:
 echo "✅ All dependencies are ready!"
 
 # Start the application
+# SERVER_MODE=gunicorn preloads the models once and forks workers that share them (see gunicorn.conf.py)
+if [ "${SERVER_MODE:-uvicorn}" = "gunicorn" ]; then
+    echo "🌟 Starting FastAPI server with gunicorn..."
+    exec gunicorn -c gunicorn.conf.py backend.app.main:app
+fi
+
 echo "🌟 Starting FastAPI server..."
 exec uvicorn backend.app.main:app --host 0.0.0.0 --port ${PORT:-10000} --workers 1
\ No newline at end of file
@@ -7,6 +7,15 @@ from pathlib import Path
 
 def start_fastapi():
     """Start FastAPI backend"""
+    # SERVER_MODE=gunicorn preloads the models once and forks workers that share them (see gunicorn.conf.py)
+    if os.environ.get("SERVER_MODE", "uvicorn") == "gunicorn":
+        print("🚀 Starting FastAPI backend with gunicorn...")
+        subprocess.run(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "backend.app.main:app"],
+            env={**os.environ, "PORT": "8000"}
+        )
+        return
+
     print("🚀 Starting FastAPI backend...")
     subprocess.run([
         sys.executable, "-m", "uvicorn", 
@@ -0,0 +1,124 @@
+"""
+Shared test setup.
+
+Backend modules import each other as top-level names (``simple_tfidf``,
+``nlp_models``...) with backend/app and backend/utils on sys.path, the way
+backend/app/main.py arranges it, so the tests do the same.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for path in (ROOT, os.path.join(ROOT, "backend", "app"), os.path.join(ROOT, "backend", "utils")):
+    if path not in sys.path:
+        sys.path.append(path)
+
+
+class StubModel:
+    """
+    Stand-in for an nlp_models.ModelView: a blank English pipeline whose
+    tagger marks the first token of every Doc NOUN and the rest VERB, so a
+    term's tag depends on whether it was tagged alone or in context. Counts
+    documents processed, per call style.
+    """
+
+    def __init__(self):
+        import spacy
+        from spacy.language import Language
+
+        if "stub_first_noun_tagger" not in Language.factories:
+            @Language.component("stub_first_noun_tagger")
+            def stub_first_noun_tagger(doc):
+                for token in doc:
+                    token.pos_ = "NOUN" if token.i == 0 else "VERB"
+                return doc
+
+        self.nlp = spacy.blank("en")
+        self.nlp.add_pipe("stub_first_noun_tagger")
+        self.calls = 0
+        self.piped = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return self.nlp(text)
+
+    def pipe(self, texts, **kwargs):
+        kwargs.pop("n_process", None)
+        for doc in self.nlp.pipe(texts, **kwargs):
+            self.piped += 1
+            yield doc
+
+
+@pytest.fixture
+def stub_nlp(monkeypatch):
+    """Route every get_nlp(profile) in simple_tfidf to per-profile StubModels"""
+    pytest.importorskip("spacy")
+    import simple_tfidf
+
+    models = {}
+
+    def get_nlp(profile="default"):
+        return models.setdefault(profile, StubModel())
+
+    monkeypatch.setattr(simple_tfidf, "get_nlp", get_nlp)
+    return models
+
+
+RESUME_INSIGHTS = '{"deficiencies": ["a"], "suggestions": ["b"], "critical_gaps": ["c"]}'
+
+
+class FakeLLMServer:
+    """
+    Stand-in for the Groq chat completions API, served through an httpx
+    MockTransport. Each API key first gets the status codes queued for it in
+    ``statuses`` (with a ``retry_after`` header), then 200s with ``content``.
+    Records the API key of every request and the most concurrent requests.
+    """
+
+    def __init__(self, content=RESUME_INSIGHTS, statuses=None, delay=0.0, retry_after=0):
+        import httpx
+
+        self.content = content
+        self.statuses = {key: list(codes) for key, codes in (statuses or {}).items()}
+        self.delay = delay
+        self.retry_after = retry_after
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.transport = httpx.MockTransport(self.handle)
+
+    async def handle(self, request):
+        import asyncio
+        import httpx
+
+        api_key = request.headers["authorization"].removeprefix("Bearer ")
+        self.requests.append(api_key)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        queued = self.statuses.get(api_key)
+        if queued:
+            status = queued.pop(0)
+            return httpx.Response(status, headers={"retry-after": str(self.retry_after)}, json={"error": {"message": f"status {status}"}})
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "test",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": self.content}}],
+        })
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """A FakeLLMServer behind a fresh client pool and an empty in-memory response cache"""
+    pytest.importorskip("openai")
+    import ai_analyzer
+    import llm_cache
+
+    server = FakeLLMServer()
+    monkeypatch.setattr(ai_analyzer, "client_pool", ai_analyzer.AsyncClientPool(transport=server.transport))
+    monkeypatch.setattr(llm_cache, "llm_cache", llm_cache.MemoryResponseCache())
+    return server
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+
+import ai_analyzer
+from ai_analyzer import AsyncClientPool, analyze_resume_with_ai_async
+
+
+def test_async_analysis_reuses_the_pooled_client(fake_llm):
+    async def analyze_twice():
+        first = await analyze_resume_with_ai_async("Python developer", "Data engineer", groq_api_key="key-a")
+        second = await analyze_resume_with_ai_async("Java developer", "Data engineer", groq_api_key="key-a")
+        return first, second
+
+    first, second = asyncio.run(analyze_twice())
+
+    assert first["suggestions"] == ["b"] and second["suggestions"] == ["b"]
+    assert fake_llm.requests == ["key-a", "key-a"]
+    assert ai_analyzer.client_pool.stats()["clients"] == 1
+
+
+def test_idle_eviction_leaves_other_loops_clients_open(fake_llm):
+    pool = AsyncClientPool(idle_seconds=0, transport=fake_llm.transport)
+    loop_a, loop_b = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        client_a = loop_a.run_until_complete(pool.get("key-a"))
+        loop_b.run_until_complete(pool.get("key-b"))  # evicts everything idle on loop B
+        assert not client_a.is_closed()
+
+        response = loop_a.run_until_complete(client_a.chat.completions.create(
+            model="test", messages=[{"role": "user", "content": "hi"}]
+        ))
+        assert response.choices[0].message.content == fake_llm.content
+        assert loop_a.run_until_complete(pool.get("key-a")) is not client_a  # idle on its own loop: replaced
+        assert client_a.is_closed()
+    finally:
+        loop_a.run_until_complete(pool.close())
+        loop_b.run_until_complete(pool.close())
+        loop_a.close()
+        loop_b.close()
+    assert pool.stats()["clients"] == 0
+
+
+def test_prompt_budgeting_input_is_capped(fake_llm, monkeypatch):
+    budgeted = []
+    budget_documents = ai_analyzer.budget_documents
+
+    def recording(documents, max_tokens):
+        budgeted.extend(len(text) for text, _ in documents)
+        return budget_documents(documents, max_tokens)
+
+    monkeypatch.setattr(ai_analyzer, "budget_documents", recording)
+    long_text = "Python developer building data pipelines. " * 2000
+
+    result = asyncio.run(analyze_resume_with_ai_async(long_text, long_text, groq_api_key="key-a"))
+
+    assert result["suggestions"] == ["b"]
+    assert budgeted == [ai_analyzer.LLM_INPUT_MAX_CHARS] * 2
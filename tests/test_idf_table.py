@@ -0,0 +1,43 @@
+import math
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("spacy")
+
+from idf_table import IDFTable, write_idf_table
+from simple_tfidf import SimpleTFIDF
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / "idf.bin"
+    write_idf_table({"python": 9, "sql": 4, "kubernetes": 1}, 10, str(path))
+    return IDFTable(str(path))
+
+
+def test_lookup(table):
+    assert len(table) == 3
+    assert table.get("sql") == pytest.approx(math.log(11 / 5) + 1)
+    assert table.get("fortran") is None
+    assert "python" in table and "fortran" not in table
+
+
+def test_min_idf_is_the_most_common_term(table):
+    assert table.min_idf == pytest.approx(math.log(11 / 10) + 1)
+
+
+def test_oov_terms_fall_back_to_the_rescaled_heuristic(table, stub_nlp):
+    scores = SimpleTFIDF(idf_table=table).compute_tf_idf(["python", "sql", "kubernetes", "xqzt"])
+    # The stub tagger tags a lone term NOUN: heuristic 1.5, scaled by min_idf / 2.0
+    assert scores["xqzt"] == pytest.approx(0.25 * 1.5 * table.min_idf / 2.0)
+    assert all(scores["xqzt"] < scores[term] for term in ("python", "sql", "kubernetes"))
+    assert stub_nlp["tagger"].piped == 1  # only the OOV term is tagged
+
+
+def test_repeated_junk_token_stays_below_rare_table_terms(table, stub_nlp):
+    tokens = ["python", "sql", "kubernetes"] + ["xqzt"] * 3  # repeated OCR noise
+    analysis_scores = SimpleTFIDF(idf_table=table).compute_tf_idf(tokens)
+    ranked = sorted(analysis_scores, key=analysis_scores.get, reverse=True)
+    assert ranked[0] == "kubernetes"
+    assert analysis_scores["xqzt"] < analysis_scores["kubernetes"]
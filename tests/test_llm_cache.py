@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+
+import executors
+import llm_cache
+from ai_analyzer import analyze_resume_with_ai_async
+
+
+class RecordingSQLiteCache(llm_cache.SQLiteResponseCache):
+    """SQLite cache noting the thread each get/put ran on"""
+
+    def __init__(self, path):
+        super().__init__(path=str(path))
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.current_thread().name)
+        return super().get(key)
+
+    def put(self, key, text):
+        self.threads.append(threading.current_thread().name)
+        super().put(key, text)
+
+
+def test_sqlite_cache_answers_repeats_off_the_event_loop(fake_llm, monkeypatch, tmp_path):
+    cache = RecordingSQLiteCache(tmp_path / "llm.sqlite3")
+    monkeypatch.setattr(llm_cache, "llm_cache", cache)
+
+    async def analyze_twice():
+        first = await analyze_resume_with_ai_async("Python developer", "Data engineer", groq_api_key="key-a")
+        second = await analyze_resume_with_ai_async("Python developer", "Data engineer", groq_api_key="key-b")
+        return first, second
+
+    first, second = asyncio.run(analyze_twice())
+
+    assert first == second
+    assert fake_llm.requests == ["key-a"]  # the repeat came from the cache
+    assert cache.stats()["hits"] == 1 and cache.stats()["entries"] == 1
+    assert len(cache.threads) == 3  # get, put, get
+    assert threading.main_thread().name not in cache.threads
+
+
+def test_sqlite_cache_calls_do_not_count_toward_the_queue_gate(fake_llm, monkeypatch, tmp_path):
+    cache = RecordingSQLiteCache(tmp_path / "llm.sqlite3")
+    monkeypatch.setattr(llm_cache, "llm_cache", cache)
+    calls = executors.MAX_QUEUE_DEPTH * 2
+
+    async def fan_out():
+        await analyze_resume_with_ai_async("Python developer", "Data engineer", groq_api_key="key-a")
+        return await asyncio.gather(*(
+            analyze_resume_with_ai_async("Python developer", "Data engineer", groq_api_key="key-a")
+            for _ in range(calls)
+        ), return_exceptions=True)
+
+    results = asyncio.run(fan_out())
+
+    assert not [result for result in results if isinstance(result, Exception)]
+    assert all(result.get("deficiencies") == ["a"] for result in results)
+    assert fake_llm.requests == ["key-a"]
+    assert cache.stats()["hits"] == calls
+
+
+def test_memory_cache_is_used_inline(fake_llm):
+    async def analyze_twice():
+        for _ in range(2):
+            await analyze_resume_with_ai_async("Python developer", None, groq_api_key="key-a")
+
+    asyncio.run(analyze_twice())
+
+    assert fake_llm.requests == ["key-a"]
+    assert llm_cache.llm_cache.stats()["hits"] == 1
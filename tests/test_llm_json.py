@@ -0,0 +1,27 @@
+from llm_json import validate
+
+
+def test_list_items_become_text_not_python_reprs():
+    data = validate({
+        "reasons": [
+            "Strong Python",
+            {"reason": "Knows SQL", "weight": 2},
+            {"skill": "Airflow"},
+            {"area": "ML", "level": "basic"},
+            ["Spark", "Kafka"],
+            3,
+            None,
+        ],
+        "fit_percentage": "70%",
+    }, "job_fit")
+
+    assert data["reasons"] == [
+        "Strong Python",
+        "Knows SQL",
+        "Airflow",
+        '{"area": "ML", "level": "basic"}',
+        '["Spark", "Kafka"]',
+        "3",
+    ]
+    assert data["fit_percentage"] == 70
+    assert data["suggestions"] == []
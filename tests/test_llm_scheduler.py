@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+
+import ai_analyzer
+import llm_cache
+from ai_analyzer import analyze_resume_with_ai_async
+from llm_scheduler import LLMScheduler
+
+
+@pytest.fixture
+def scheduler(fake_llm, monkeypatch):
+    """Route analyze_resume_with_ai_async through a fresh scheduler, with no response cache"""
+    monkeypatch.setattr(llm_cache, "llm_cache", llm_cache.NullResponseCache())
+
+    def install(**options):
+        scheduler = LLMScheduler(**options)
+        monkeypatch.setattr(ai_analyzer, "llm_scheduler", scheduler)
+        return scheduler
+
+    return install
+
+
+def test_backoff_after_429_frees_the_slot(fake_llm, scheduler):
+    fake_llm.statuses = {"key-a": [429]}
+    fake_llm.retry_after = 1
+    llm = scheduler(max_concurrency=1, requests_per_minute=0, base_delay=0.01)
+
+    async def run():
+        first = asyncio.create_task(analyze_resume_with_ai_async("resume a", groq_api_key="key-a"))
+        await asyncio.sleep(0.05)  # key-a has had its 429 and is backing off
+        second = await asyncio.wait_for(analyze_resume_with_ai_async("resume b", groq_api_key="key-b"), 0.8)
+        return await first, second
+
+    first, second = asyncio.run(run())
+
+    assert "error" not in first and "error" not in second
+    assert fake_llm.requests == ["key-a", "key-b", "key-a"]
+    stats = llm.stats()
+    assert (stats["completed"], stats["rate_limited"], stats["retries"]) == (2, 1, 1)
+    assert (stats["waiting"], stats["in_flight"]) == (0, 0)
+
+
+def test_key_out_of_budget_does_not_block_other_keys(fake_llm, scheduler):
+    llm = scheduler(max_concurrency=2, requests_per_minute=2)
+
+    async def run():
+        # key-a spends its two requests; the next two wait ~30s each for refills
+        key_a = [asyncio.create_task(analyze_resume_with_ai_async(f"resume {i}", groq_api_key="key-a")) for i in range(4)]
+        await asyncio.sleep(0.1)
+        try:
+            return await asyncio.wait_for(analyze_resume_with_ai_async("resume b", groq_api_key="key-b"), 1)
+        finally:
+            for task in key_a:
+                task.cancel()
+            await asyncio.gather(*key_a, return_exceptions=True)
+
+    result = asyncio.run(run())
+
+    assert "error" not in result
+    assert fake_llm.requests == ["key-a", "key-a", "key-b"]
+    assert llm.stats()["completed"] == 3
@@ -0,0 +1,130 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("spacy")
+pytest.importorskip("pdfplumber")
+pytest.importorskip("openai")
+
+import executors
+import main
+from fastapi.testclient import TestClient
+
+UTILS_DIR = os.path.join(os.path.dirname(__file__), "..", "backend", "utils")
+JOB = "Python developer building data pipelines with SQL and machine learning"
+
+
+def read_pdf(name):
+    with open(os.path.join(UTILS_DIR, name), "rb") as f:
+        return f.read()
+
+
+def parse_events(body):
+    """[(event, payload)] from a text/event-stream body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def client(stub_nlp, monkeypatch):
+    """TestClient (without the warmup lifespan) running CPU stages on threads"""
+    monkeypatch.setattr(executors, "CPU_WORKERS", 0)
+    return TestClient(main.app)
+
+
+def test_analyze_resume_stream_without_key(client):
+    response = client.post("/analyze-resume-stream/", files={"file": ("lorem.pdf", read_pdf("Lorem_ipsum.pdf"))})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    names = [event for event, _ in events]
+    assert names[0] == "extracted_text" and names[-1] == "done"
+    assert sorted(names[1:-1]) == ["keywords", "llm"]
+    assert "Lorem Ipsum" in events[0][1]["extracted_text"]
+    assert dict(events)["llm"] == {"llm_strengths_weaknesses": None}
+    assert {"extract", "tfidf", "llm", "total"} <= set(events[-1][1]["timings_ms"])
+
+
+def test_analyze_resume_stream_with_llm(client, fake_llm):
+    response = client.post(
+        "/analyze-resume-stream/",
+        files={"file": ("lorem.pdf", read_pdf("Lorem_ipsum.pdf"))},
+        data={"groq_api_key": "key-a"},
+    )
+
+    events = parse_events(response.text)
+    names = [event for event, _ in events]
+    assert sorted(names) == ["done", "extracted_text", "keywords", "llm"]
+    assert names[-1] == "done"
+    assert names.index("extracted_text") < names.index("keywords")
+    assert dict(events)["llm"]["llm_strengths_weaknesses"]["deficiencies"] == ["a"]
+    assert fake_llm.requests == ["key-a"]
+
+
+def test_match_resume_job_stream(client, fake_llm):
+    response = client.post(
+        "/match-resume-job-stream/",
+        files={"file": ("lorem.pdf", read_pdf("Lorem_ipsum.pdf"))},
+        data={"job_description": JOB, "groq_api_key": "key-a"},
+    )
+
+    events = parse_events(response.text)
+    names = [event for event, _ in events]
+    assert sorted(names) == ["done", "extracted_text", "keywords", "llm", "similarity"]
+    assert names[-1] == "done"
+    assert names.index("extracted_text") < names.index("keywords") < names.index("similarity")
+    assert "similarity_analysis" in dict(events)["similarity"]
+    assert dict(events)["llm"]["llm_fit_assessment"]["deficiencies"] == ["a"]
+
+
+def test_match_resume_job_pdf_stream(client):
+    response = client.post(
+        "/match-resume-job-pdf-stream/",
+        files={
+            "file": ("lorem.pdf", read_pdf("Lorem_ipsum.pdf")),
+            "jd_file": ("symbols.pdf", read_pdf("PDF_with_symbols.pdf")),
+        },
+    )
+
+    events = parse_events(response.text)
+    names = [event for event, _ in events]
+    assert sorted(names) == ["done", "extracted_text", "extracted_text", "keywords", "llm", "similarity"]
+    assert names[-1] == "done"
+    assert max(i for i, name in enumerate(names) if name == "extracted_text") < names.index("keywords")
+    assert names.index("keywords") < names.index("similarity")
+    extracted = {key for event, payload in events if event == "extracted_text" for key in payload}
+    assert extracted == {"resume_text", "job_description_text"}
+
+
+def test_stream_reports_a_full_queue_as_503(client, monkeypatch):
+    monkeypatch.setattr(executors, "MAX_QUEUE_DEPTH", 0)
+
+    response = client.post("/analyze-resume-stream/", files={"file": ("new.pdf", b"%PDF-1.4 not cached")})
+
+    assert response.status_code == 200
+    [(event, payload)] = parse_events(response.text)
+    assert event == "error"
+    assert payload["status"] == 503
+    assert "Server busy" in payload["error"]
+
+
+def test_stream_reports_a_failed_stage_as_500_and_stops(client, monkeypatch):
+    def fail(content, output_path=None):
+        raise ValueError("unreadable PDF")
+
+    monkeypatch.setattr(main, "textextractionfunction", fail)
+
+    response = client.post(
+        "/match-resume-job-stream/",
+        files={"file": ("broken.pdf", b"%PDF-1.4 broken")},
+        data={"job_description": JOB},
+    )
+
+    [(event, payload)] = parse_events(response.text)
+    assert event == "error"
+    assert payload == {"status": 500, "error": "Processing failed: unreadable PDF"}
@@ -0,0 +1,139 @@
+import io
+import os
+
+import pytest
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("pdf2image")
+pytest.importorskip("pytesseract")
+pytest.importorskip("bs4")
+
+import pdf_parser
+from pdf2image.exceptions import PDFInfoNotInstalledError
+
+UTILS_DIR = os.path.join(os.path.dirname(__file__), "..", "backend", "utils")
+
+
+def fail_ocr(file_path, page_number):
+    raise PDFInfoNotInstalledError("Unable to get page count. Is poppler installed and in PATH?")
+
+
+def pdf_with_blank_page():
+    pypdf = pytest.importorskip("pypdf")
+    writer = pypdf.PdfWriter(clone_from=os.path.join(UTILS_DIR, "Lorem_ipsum.pdf"))
+    writer.add_blank_page()
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def test_failed_ocr_keeps_text_of_other_pages(monkeypatch):
+    monkeypatch.setattr(pdf_parser, "ocr_page", fail_ocr)
+    data = pdf_with_blank_page()
+
+    text = pdf_parser.extract_text_from_any_pdf(data)
+
+    assert text == pdf_parser.extract_text_from_any_pdf(os.path.join(UTILS_DIR, "Lorem_ipsum.pdf"))
+    assert text
+
+
+def test_one_failed_page_does_not_drop_the_others(monkeypatch):
+    def ocr_page(file_path, page_number):
+        if page_number == 2:
+            return fail_ocr(file_path, page_number)
+        return f"scanned page {page_number}"
+
+    monkeypatch.setattr(pdf_parser, "ocr_page", ocr_page)
+    monkeypatch.setattr(pdf_parser, "extract_pages_with_pdfplumber", lambda source: ["", "", ""])
+
+    assert pdf_parser.extract_text_from_any_pdf("scan.pdf") == "scanned page 1scanned page 3"
+
+
+def test_fails_when_no_page_has_text(monkeypatch):
+    monkeypatch.setattr(pdf_parser, "ocr_page", fail_ocr)
+    monkeypatch.setattr(pdf_parser, "extract_pages_with_pdfplumber", lambda source: ["", ""])
+
+    with pytest.raises(PDFInfoNotInstalledError):
+        pdf_parser.extract_text_from_any_pdf("scan.pdf")
+
+
+SAMPLE_PDFS = sorted(
+    os.path.join(directory, name)
+    for directory in (UTILS_DIR, os.path.join(UTILS_DIR, "..", "app"))
+    for name in os.listdir(directory)
+    if name.endswith(".pdf")
+)
+
+
+@pytest.mark.parametrize("path", SAMPLE_PDFS, ids=os.path.basename)
+def test_clean_matches_reference_on_sample_pdfs(path):
+    pages = pdf_parser.extract_pages_with_pdfplumber(path)
+    for text in pages + [''.join(pages)]:
+        assert pdf_parser.clean_extracted_text(text) == pdf_parser._reference_clean(text)
+
+
+@pytest.mark.parametrize("text", [
+    "Led team 20xx - 19xx, xx  results ➢ • done",
+    "xx at start, xxl and 123xx and a20xx and 20xxy end xx",
+    "<p>Hello&nbsp;<b>world</b></p>\n\n&amp; more",
+    "5 < 6 and AT&T tabs\tand\r\nlines",
+    "café naïve – “quoted” résumé_name",
+])
+def test_clean_matches_reference_on_edge_cases(text):
+    assert pdf_parser.clean_extracted_text(text) == pdf_parser._reference_clean(text)
+
+
+MULTI_PAGE_PDF = os.path.join(UTILS_DIR, "sample-tables.pdf")
+
+
+def count_page_extractions(monkeypatch):
+    calls = []
+    extract_text = pdf_parser.pdfplumber.page.Page.extract_text
+
+    def counting(page, *args, **kwargs):
+        calls.append(page.page_number)
+        return extract_text(page, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_parser.pdfplumber.page.Page, "extract_text", counting)
+    return calls
+
+
+def test_iter_pdf_pages_stops_at_max_pages(monkeypatch):
+    calls = count_page_extractions(monkeypatch)
+
+    pages = list(pdf_parser.iter_pdf_pages(MULTI_PAGE_PDF, max_pages=2))
+
+    assert calls == [1, 2]
+    assert pages == list(pdf_parser.iter_pdf_pages(MULTI_PAGE_PDF))[:2]
+
+
+def test_iter_pdf_pages_truncates_at_max_chars(monkeypatch):
+    full = list(pdf_parser.iter_pdf_pages(MULTI_PAGE_PDF))
+    max_chars = len(full[0]) + 10
+    calls = count_page_extractions(monkeypatch)
+
+    pages = list(pdf_parser.iter_pdf_pages(MULTI_PAGE_PDF, max_chars=max_chars))
+
+    assert pages == [full[0], full[1][:10]]
+    assert sum(len(page) for page in pages) == max_chars
+    assert calls == [1, 2]
+
+
+def test_iter_pdf_pages_stops_when_the_consumer_does(monkeypatch):
+    calls = count_page_extractions(monkeypatch)
+    with open(MULTI_PAGE_PDF, "rb") as f:
+        pages = pdf_parser.iter_pdf_pages(f.read())
+
+    first = next(pages)
+    pages.close()
+
+    assert first
+    assert calls == [1]
+
+
+def test_extract_text_prefix_is_a_prefix_of_the_page_text():
+    full = " ".join(pdf_parser.iter_pdf_pages(MULTI_PAGE_PDF))
+
+    prefix = pdf_parser.extract_text_prefix(MULTI_PAGE_PDF, 500)
+
+    assert prefix == full[:500]
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from pipeline import StageGraph, sse_event
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_stages_get_their_dependencies_results_and_overlap():
+    active = []
+    peak = []
+
+    def stage(value, delay):
+        async def func(*deps):
+            active.append(value)
+            peak.append(len(active))
+            await asyncio.sleep(delay)
+            active.remove(value)
+            return value + sum(deps)
+        return func
+
+    graph = StageGraph()
+    graph.add("a", stage(1, 0.05))
+    graph.add("b", stage(10, 0.01))
+    graph.add("c", stage(100, 0.01), "a", "b")
+
+    async def collect():
+        return [item async for item in graph.as_completed()]
+
+    assert run(collect()) == [("b", 10), ("a", 1), ("c", 111)]
+    assert max(peak) == 2  # a and b ran together; c waited for both
+    assert set(graph.timings_ms()) == {"a", "b", "c", "total"}
+
+
+def test_stages_finishing_together_come_in_dependency_order():
+    async def instant(*deps):
+        return len(deps)
+
+    for _ in range(20):
+        graph = StageGraph()
+        graph.add("extract", instant)
+        graph.add("tfidf", instant, "extract")
+        graph.add("llm", instant, "extract")
+        assert list(run(graph.run())) == ["extract", "tfidf", "llm"]
+
+
+def test_failing_stage_cancels_the_rest_and_propagates():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def fail():
+        raise RuntimeError("extraction failed")
+
+    async def never_called(_):
+        raise AssertionError("dependent stage ran")
+
+    graph = StageGraph()
+    graph.add("slow", slow)
+    graph.add("fail", fail)
+    graph.add("after", never_called, "fail")
+
+    with pytest.raises(RuntimeError, match="extraction failed"):
+        run(graph.run())
+    assert cancelled == ["slow"]
+
+
+def test_unknown_dependency_is_rejected():
+    graph = StageGraph()
+    with pytest.raises(ValueError, match="unknown stage 'extract'"):
+        graph.add("tfidf", lambda text: text, "extract")
+
+
+def test_sse_event_format():
+    assert sse_event("done", {"ok": True}) == 'event: done\ndata: {"ok": true}\n\n'
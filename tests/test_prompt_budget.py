@@ -0,0 +1,55 @@
+import pytest
+
+from prompt_budget import budget_documents, budget_text, count_tokens, split_sentences
+
+RESUME = " ".join(
+    f"Sentence {i} covers project {i} with python, sql and cloud deployment for client {i}."
+    for i in range(60)
+)
+JOB = " ".join(f"Requirement {i}: experience with kafka, spark and streaming systems." for i in range(60))
+
+
+def in_order(selected, text):
+    """True if every selected sentence appears in text, in the same order"""
+    position = 0
+    for sentence in split_sentences(selected):
+        position = text.find(sentence, position)
+        if position < 0:
+            return False
+        position += len(sentence)
+    return True
+
+
+@pytest.mark.parametrize("budget", [20, 100, 400])
+def test_budget_is_respected(budget):
+    assert count_tokens(budget_text(RESUME, budget)) <= budget
+
+
+def test_budgeting_keeps_sentence_order():
+    scores = {"project 50": 9.0, "client 3": 8.0, "sentence 30": 7.0}
+
+    budgeted = budget_text(RESUME, 60, scores)
+
+    assert budgeted != RESUME
+    assert in_order(budgeted, RESUME)
+    assert budgeted.index("project 3 ") < budgeted.index("project 30 ") < budgeted.index("project 50 ")
+
+
+@pytest.mark.parametrize("text", ["", "Python developer. Built data pipelines.", RESUME])
+def test_text_under_budget_is_unchanged(text):
+    assert budget_text(text, count_tokens(RESUME)) == text
+
+
+def test_shared_budget_is_split_between_resume_and_job():
+    budget = 400
+    short_job = "Python developer with sql."
+
+    resume, job = budget_documents([(RESUME, None), (JOB, None)], budget)
+    assert count_tokens(resume) + count_tokens(job) <= budget
+    assert abs(count_tokens(resume) - count_tokens(job)) <= 30  # both larger than half: an even split
+    assert in_order(resume, RESUME) and in_order(job, JOB)
+
+    resume, job = budget_documents([(RESUME, None), (short_job, None)], budget)
+    assert job == short_job  # a document under its share keeps everything
+    assert count_tokens(resume) <= budget - count_tokens(short_job)
+    assert count_tokens(resume) > budget // 2  # and leaves the rest to the other
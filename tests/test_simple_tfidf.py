@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("spacy")
+pytest.importorskip("numpy")
+
+from simple_tfidf import SimpleTFIDF
+
+RESUME = (
+    "Experienced python developer building data pipelines with sql and machine learning. "
+    "Python testing, deployment and monitoring for analytics platforms."
+)
+
+
+def baseline_tf_idf(analyzer, tokens, nlp):
+    """The original scoring: every single-word term tagged with its own nlp(term) call"""
+    scores = {}
+    for term, tf in analyzer.compute_tf(tokens).items():
+        if len(term.split()) > 1:
+            idf = 2.0
+        elif nlp(term)[0].pos_ in ("NOUN", "PROPN"):
+            idf = 1.5
+        else:
+            idf = 0.5
+        scores[term] = tf * idf
+    return scores
+
+
+def test_analyze_runs_the_model_once_per_document(stub_nlp):
+    SimpleTFIDF().analyze(RESUME)
+    assert stub_nlp["default"].calls == 1
+    assert stub_nlp["default"].piped == 0
+
+
+def test_analyze_many_runs_the_model_once_per_document(stub_nlp):
+    SimpleTFIDF().analyze_many([RESUME, RESUME.upper(), "sql"])
+    assert stub_nlp["default"].calls == 0
+    assert stub_nlp["default"].piped == 3
+
+
+def test_scores_match_per_term_tagging(stub_nlp):
+    analyzer = SimpleTFIDF()
+    analysis = analyzer.analyze(RESUME)
+    expected = baseline_tf_idf(analyzer, analysis.tokens, stub_nlp["tagger"].nlp)
+    assert analysis.tfidf == pytest.approx(expected)
+    assert stub_nlp["tagger"].calls == 0  # terms are tagged in one pipe batch
+
+
+def test_missing_parser_skips_key_terms_quietly(stub_nlp, caplog):
+    analyzer = SimpleTFIDF()
+    with caplog.at_level("DEBUG", logger="simple_tfidf"):
+        assert analyzer.extract_key_terms("Senior Python developer") == set()
+        analyzer.analyze("Senior Python developer building data pipelines")
+
+    assert not [record for record in caplog.records if record.levelname == "WARNING"]
+    assert "No dependency parse" in caplog.text
+
+
+def test_analyze_stream_matches_analyze_on_one_chunk(stub_nlp):
+    analyzer = SimpleTFIDF()
+    expected = analyzer.analyze(RESUME)
+
+    for chunks in ([RESUME], iter([RESUME, "", None])):
+        analysis = analyzer.analyze_stream(chunks)
+        assert analysis.tokens == expected.tokens
+        assert analysis.tfidf == pytest.approx(expected.tfidf)
@@ -0,0 +1,32 @@
+import os
+
+from text_cache import TextCache
+
+
+def test_memory_then_disk_tier(tmp_path):
+    cache = TextCache(max_entries=1, disk_dir=str(tmp_path))
+    cache.put("a", "first")
+    cache.put("b", "second")  # pushes "a" out of memory
+
+    assert cache.get_memory("a") is None
+    assert cache.get("a") == "first"
+    assert cache.get_memory("a") == "first"
+    assert cache.get("missing") is None
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_eviction_counts_entries_written_by_other_processes(tmp_path):
+    limit = 25
+    ours = TextCache(max_entries=0, disk_dir=str(tmp_path), disk_max_bytes=limit)
+    theirs = TextCache(max_entries=0, disk_dir=str(tmp_path), disk_max_bytes=limit)
+    for index in range(3):
+        theirs.put(f"theirs{index}", "x" * 10)
+        os.utime(os.path.join(tmp_path, f"theirs{index}.txt"), (index, index))
+
+    ours.put("ours", "y" * 10)
+
+    sizes = [os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path)]
+    assert sum(sizes) <= limit
+    assert ours.get("ours") == "y" * 10
+    assert ours.stats()["disk_bytes"] == sum(sizes)
@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("spacy")
+pytest.importorskip("numpy")
+pytest.importorskip("openai")
+
+import tfidf_analyzer
+from tfidf_analyzer import calculate_resume_job_similarity, rank_resumes_against_job
+
+JOB = "Python developer building data pipelines with SQL and machine learning"
+RESUMES = [
+    "Java engineer with Spring and Kafka experience",
+    "Python developer, SQL data pipelines, machine learning models in production",
+    "",
+    "Data analyst using SQL and Python for reporting",
+]
+
+
+def test_ranking_matches_single_resume_similarity(stub_nlp, monkeypatch):
+    compared = []
+    analyzer = tfidf_analyzer.get_analyzer()
+    compare_many = analyzer.compare_many
+    monkeypatch.setattr(analyzer, "compare_many", lambda *args: compared.append(args) or compare_many(*args))
+
+    ranking = rank_resumes_against_job(RESUMES, JOB)
+
+    assert len(compared) == 1
+    by_index = {entry["index"]: entry["similarity_analysis"] for entry in ranking["ranked_resumes"]}
+    for index, resume in enumerate(RESUMES):
+        expected = calculate_resume_job_similarity(resume, JOB)
+        assert by_index[index]["similarity_score"] == pytest.approx(expected["similarity_score"])
+        assert by_index[index]["match_quality"] == expected["match_quality"]
+        assert [kw["term"] for kw in by_index[index]["common_keywords"]] == [kw["term"] for kw in expected["common_keywords"]]
+    scores = [entry["similarity_analysis"]["similarity_score"] for entry in ranking["ranked_resumes"]]
+    assert scores == sorted(scores, reverse=True)
+    assert ranking["ranked_resumes"][0]["index"] == 1